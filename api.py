@@ -0,0 +1,125 @@
+import json
+from datetime import date
+
+from flask import Blueprint, Response, abort, jsonify, request, stream_with_context
+
+from models import db, Venue, Artist, Show
+from replicas import read_only
+from queries import venue_shows, artist_shows, with_genres
+import validation
+from validation import GENRES, Invalid
+
+#----------------------------------------------------------------------------#
+# JSON API.
+#----------------------------------------------------------------------------#
+# Versioned read API for downstream services. Collections are streamed as
+# NDJSON (one object per line) from a server-side cursor, so a full export
+# holds one batch of rows in memory rather than the whole table.
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+STREAM_BATCH_SIZE = 1000
+
+
+def _serialize(row):
+    return {
+        key: value.isoformat() if isinstance(value, date) else value
+        for key, value in row._mapping.items()
+    }
+
+
+def _columns(model):
+    return list(model.__table__.columns)
+
+
+def stream(query):
+    """Stream the rows of ``query`` as NDJSON."""
+    def generate():
+        rows = db.session.execute(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+        for row in rows:
+            yield json.dumps(_serialize(row)) + '\n'
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+def _with_shows(record, shows):
+    for show in shows['past_shows'] + shows['upcoming_shows']:
+        show['start_time'] = show['start_time'].isoformat()
+    return jsonify({**record, **shows})
+
+
+def _genres():
+    """The ?genre= filters of the request: rows must have every one of them."""
+    try:
+        return validation.genres(request.args.getlist('genre'))
+    except Invalid:
+        abort(400, "genre must be one of those listed at /api/v1/genres")
+
+
+def _record(model, record_id):
+    row = db.session.execute(db.select(*_columns(model)).where(model.id == record_id)).first()
+    if row is None:
+        abort(404)
+    return _serialize(row)
+
+#  Venues
+#  ----------------------------------------------------------------
+
+@api.route('/venues')
+@read_only
+def venues():
+    # optional ?genre= filters
+    return stream(with_genres(db.select(*_columns(Venue)).order_by(Venue.id), Venue, _genres()))
+
+
+@api.route('/venues/<int:venue_id>')
+@read_only
+def venue(venue_id):
+    return _with_shows(_record(Venue, venue_id), venue_shows(venue_id))
+
+#  Artists
+#  ----------------------------------------------------------------
+
+@api.route('/artists')
+@read_only
+def artists():
+    # optional ?genre= filters
+    return stream(with_genres(db.select(*_columns(Artist)).order_by(Artist.id), Artist, _genres()))
+
+
+@api.route('/artists/<int:artist_id>')
+@read_only
+def artist(artist_id):
+    return _with_shows(_record(Artist, artist_id), artist_shows(artist_id))
+
+#  Shows
+#  ----------------------------------------------------------------
+
+@api.route('/shows')
+@read_only
+def shows():
+    # optional ?venue_id= / ?artist_id= filters
+    query = db.select(*_columns(Show)).order_by(Show.start_time, Show.id)
+    for column in (Show.venue_id, Show.artist_id):
+        value = request.args.get(column.key, type=int)
+        if value is not None:
+            query = query.where(column == value)
+    return stream(query)
+
+
+#  Genres
+#  ----------------------------------------------------------------
+
+@api.route('/genres')
+def genres():
+    # the values accepted by the ?genre= filters
+    return jsonify({"genres": list(GENRES)})
+
+
+@api.errorhandler(400)
+def bad_request_error(error):
+    return jsonify({"error": error.description}), 400
+
+
+@api.errorhandler(404)
+def not_found_error(error):
+    return jsonify({"error": "not found"}), 404
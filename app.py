@@ -2,29 +2,133 @@
 # Imports
 #----------------------------------------------------------------------------#
 
-import json
-import dateutil.parser
-import babel
-from flask import Flask, render_template, request, Response, flash, redirect, url_for
+from flask import Flask, render_template, request, flash, redirect, url_for, jsonify, current_app, abort
 from flask_moment import Moment
-from flask_sqlalchemy import SQLAlchemy
+import functools
+import ipaddress
 import logging
 from logging import Formatter, FileHandler
-from flask_wtf import Form
-from forms import *
-from models import db, Venue, Artist, Show  # Import db and models
-from flask_migrate import Migrate 
+from models import db, Venue, Artist, Show, Availability  # Import db and models
+import dbpool
+from replicas import replicas, read_only
+from cache import cache
+from profiler import profiler
+from queries import (
+    recent_listings, venue_areas, artist_list, show_feed,
+    venue_detail, artist_detail, venue_shows, artist_shows
+)
+from search import search_results
+from api import api
+from availability import (
+    parse_availability, format_availability, artist_slots, set_artist_availability, is_available
+)
+from bookings import find_conflict
+from validation import GENRES
+from counters import counters_cli, record_shows
+from formatting import format_datetime, label_show_times
+import http_cache
+from assets import assets, assets_cli
+from rendering import rendering, templates_cli
+from startup import LazyCommand, startup_cli
+from sqlalchemy.exc import IntegrityError
+# The forms (WTForms) are imported by the views using them, Flask-Migrate by `flask db` (startup.py)
 
 #----------------------------------------------------------------------------#
 # App Config.
 #----------------------------------------------------------------------------#
+# create_app() builds the app; `app`, for `flask run` and the modules importing
+# it, is created by the first access to it.
+
+moment = Moment()
+routes = []  # (rule, view, options) of the controllers below
+error_handlers = {}
+
+
+def create_app(config='config'):
+  app = Flask(__name__)
+  app.config.from_object(config)
+  app.config['WTF_CSRF_ENABLED'] = True
+  moment.init_app(app)
+  dbpool.init_app(app)  # Instrumented connection pool, before the engine is created
+  replicas.init_app(app)  # Replica binds for @read_only views, with the same pool options
+  db.init_app(app)  # Bind the db object to the app
+  cache.init_app(app)  # Result cache, invalidated on commit
+  profiler.init_app(app)  # Per-request SQL statement counts and N+1 detection
+  assets.init_app(app)  # Hashed, pre-compressed bundles under /static/dist
+  app.register_blueprint(api)  # JSON API under /api/v1
+  for rule, view, options in routes:
+    app.add_url_rule(rule, view_func=view, **options)
+  for code, handler in error_handlers.items():
+    app.register_error_handler(code, handler)
+
+  # Commands are imported when run
+  app.cli.add_command(LazyCommand('db', migrate_cli, 'Perform database migrations.'))  # Flask-Migrate
+  app.cli.add_command(LazyCommand('import', 'importer:import_cli',  # flask import venues|artists|shows FILE
+                                  'Bulk-load venues, artists and shows from CSV or NDJSON files.'))
+  app.cli.add_command(LazyCommand('generate', 'synthetic:generate_command',  # flask generate --venues N ...
+                                  'Load a synthetic, production-shaped dataset.'))
+  app.cli.add_command(counters_cli)  # flask counters rollover|rebuild
+  app.cli.add_command(assets_cli)  # flask assets build
+  app.cli.add_command(templates_cli)  # flask templates compile
+  app.cli.add_command(startup_cli)  # flask startup report
+
+  # For single values; pages listing shows label them in one batch (formatting.py)
+  app.jinja_env.filters['datetime'] = format_datetime
+  # Bytecode cache and render timing; templates are compiled by startup.warm_up()
+  rendering.init_app(app)
+
+  if not app.debug:
+    file_handler = FileHandler('error.log')
+    file_handler.setFormatter(
+        Formatter('%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
+    )
+    app.logger.setLevel(logging.INFO)
+    file_handler.setLevel(logging.INFO)
+    app.logger.addHandler(file_handler)
+    app.logger.info('errors')
+  return app
+
+
+def __getattr__(name):
+  if name == 'app':
+    globals()['app'] = create_app()
+    return globals()['app']
+  raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def route(rule, **options):
+  def register(view):
+    routes.append((rule, view, options))
+    return view
+  return register
+
 
-app = Flask(__name__)
-moment = Moment(app)
-app.config.from_object('config')
-app.config['WTF_CSRF_ENABLED'] = True
-db.init_app(app)  # Bind the db object to the app
-migrate = Migrate(app, db)  # Initialize Migrate
+def errorhandler(code):
+  def register(handler):
+    error_handlers[code] = handler
+    return handler
+  return register
+
+
+def internal(view):
+  # Only clients in METRICS_ALLOWED_IPS may call the view
+  @functools.wraps(view)
+  def guarded(*args, **kwargs):
+    try:
+      address = ipaddress.ip_address(request.remote_addr or '')
+    except ValueError:
+      abort(403)
+    if not any(address in ipaddress.ip_network(allowed.strip(), strict=False)
+               for allowed in current_app.config['METRICS_ALLOWED_IPS'] if allowed.strip()):
+      abort(403)
+    return view(*args, **kwargs)
+  return guarded
+
+
+def migrate_cli():
+  from flask_migrate import Migrate, cli
+  Migrate(current_app, db)
+  return cli.db
 
 
 # TODO: connect to a local postgresql database - DONE by adding the DB connection line in config.py
@@ -34,153 +138,74 @@ migrate = Migrate(app, db)  # Initialize Migrate
 #----------------------------------------------------------------------------#
 # Moved to models.py for Separation of Concers.
 
-#----------------------------------------------------------------------------#
-# Filters.
-#----------------------------------------------------------------------------#
-
-def format_datetime(value, format='medium'):
-  date = dateutil.parser.parse(value)
-  if format == 'full':
-      format="EEEE MMMM, d, y 'at' h:mma"
-  elif format == 'medium':
-      format="EE MM, dd, y h:mma"
-  return babel.dates.format_datetime(date, format, locale='en')
-
-app.jinja_env.filters['datetime'] = format_datetime
-
 #----------------------------------------------------------------------------#
 # Controllers.
 #----------------------------------------------------------------------------#
 
-@app.route('/')
+@route('/')
 def index():
   # Show recently listed artists and venues
-  recent_artists = Artist.query.order_by(Artist.id.desc()).limit(10).all()
-  recent_venues = Venue.query.order_by(Venue.id.desc()).limit(10).all()
-  return render_template('pages/home.html', artists=recent_artists, venues=recent_venues)
+  # Served from the cache until a Venue or Artist write is committed
+  recent = cache.get_or_set('home', recent_listings, depends_on=(Artist, Venue))
+  return render_template('pages/home.html', artists=recent['artists'], venues=recent['venues'])
 
 #  Venues
 #  ----------------------------------------------------------------
 
-@app.route('/venues')
+@route('/venues')
+@read_only
 def venues():
   # TODO: replace with real venues data.
   #       num_upcoming_shows should be aggregated based on number of upcoming shows per venue. - DONE
-  venues = Venue.query.all()
-  data = []
-  cities_states = set()
-  for venue in venues:
-      cities_states.add((venue.city, venue.state))
-
-  cities_states = list(cities_states)
-  cities_states.sort(key=lambda x: (x[1], x[0]))
-
-  for loc in cities_states:
-      venues_list = []
-      for venue in venues:
-          if (venue.city == loc[0]) and (venue.state == loc[1]):
-              venues_list.append({
-                  "id": venue.id,
-                  "name": venue.name,
-                  "num_upcoming_shows": len(list(filter(lambda show: show.start_time > datetime.now(), venue.shows)))
-              })
-      data.append({
-          "city": loc[0],
-          "state": loc[1],
-          "venues": venues_list
-      })
-  return render_template('pages/venues.html', areas=data);
-
-@app.route('/venues/search', methods=['POST'])
+  genres = request.args.getlist('genre')  # ?genre=Jazz&genre=Blues: venues with both
+  data = venue_areas(genres)
+  return render_template('pages/venues.html', areas=data, genres=genres, all_genres=GENRES);
+
+@route('/venues/search', methods=['POST'])
+@read_only
 def search_venues():
   # TODO: implement search on artists with partial string search. Ensure it is case-insensitive.
   # seach for Hop should return "The Musical Hop".
   # search for "Music" should return "The Musical Hop" and "Park Square Live Music & Coffee" - DONE
   search_term = request.form.get('search_term', '')
-  search_terms = search_term.split(",")  # Split the search term by comma
-  if len(search_terms) == 2:  # Check if both city and state are provided
-      city = search_terms[0].strip()
-      state = search_terms[1].strip()
-      venues = Venue.query.filter(Venue.city.ilike(f"%{city}%"), Venue.state.ilike(f"%{state}%")).all()
-  else:
-      venues = Venue.query.filter(Venue.name.ilike(f"%{search_term}%")).all()
-  response = {
-      "count": len(venues),
-      "data": []
-  }
-  for venue in venues:
-      response["data"].append({
-          "id": venue.id,
-          "name": venue.name,
-          "num_upcoming_shows": len(list(filter(lambda show: show.start_time > datetime.now(), venue.shows)))
-      })
-  return render_template('pages/search_venues.html', results=response, search_term=request.form.get('search_term', ''))
-
-@app.route('/venues/<int:venue_id>')
+  genres = request.values.getlist('genre')  # kept from a genre-filtered listing
+  # "City, State" searches by location
+  response = search_results(Venue, search_term, current_app.config['SEARCH_RESULTS_LIMIT'], genres)
+  return render_template('pages/search_venues.html', results=response, search_term=request.form.get('search_term', ''),
+                         genres=genres)
+
+@route('/venues/<int:venue_id>')
+@read_only
 def show_venue(venue_id):
   # shows the venue page with the given venue_id
   # TODO: replace with real venue data from the venues table, using venue_id - DONE
+  validators = http_cache.validators(Venue, venue_id)  # Indexed lookups of the page version
+  if http_cache.is_fresh(validators):
+      return http_cache.not_modified(validators)
+
   venue = Venue.query.get(venue_id)
   if not venue:
       return render_template('errors/404.html'), 404
 
-  # Use JOINs to fetch past and upcoming shows
-  past_shows_query = db.session.query(Show).join(Artist).filter(Show.venue_id == venue_id).filter(
-      Show.start_time < datetime.now()
-  ).all()
-  past_shows = []
-  for show in past_shows_query:
-      past_shows.append({
-          "artist_id": show.artist_id,
-          "artist_name": show.artist.name,
-          "artist_image_link": show.artist.image_link,
-          "start_time": str(show.start_time)
-      })
-
-  upcoming_shows_query = db.session.query(Show).join(Artist).filter(Show.venue_id == venue_id).filter(
-      Show.start_time > datetime.now()
-  ).all()
-  upcoming_shows = []
-  for show in upcoming_shows_query:
-      upcoming_shows.append({
-          "artist_id": show.artist_id,
-          "artist_name": show.artist.name,
-          "artist_image_link": show.artist.image_link,
-          "start_time": str(show.start_time)
-      })
-  data = {
-      "id": venue.id,
-      "name": venue.name,
-      "genres": venue.genres,
-      "address": venue.address,
-      "city": venue.city,
-      "state": venue.state,
-      "phone": venue.phone,
-      "website": venue.website,
-      "facebook_link": venue.facebook_link,
-      "seeking_talent": venue.seeking_talent,
-      "seeking_description": venue.seeking_description,
-      "image_link": venue.image_link,
-      "past_shows": past_shows,
-      "upcoming_shows": upcoming_shows,
-      "past_shows_count": len(past_shows),
-      "upcoming_shows_count": len(upcoming_shows)
-  }
-  return render_template('pages/show_venue.html', venue=data)
+  data = {**venue_detail(venue), **venue_shows(venue_id)}
+  label_show_times(data['past_shows'] + data['upcoming_shows'])
+  return http_cache.with_validators(render_template('pages/show_venue.html', venue=data), validators)
 
 #  Create Venue
 #  ----------------------------------------------------------------
 
-@app.route('/venues/create', methods=['GET'])
+@route('/venues/create', methods=['GET'])
 def create_venue_form():
+  from forms import VenueForm
   form = VenueForm()
   return render_template('forms/new_venue.html', form=form)
 
-@app.route('/venues/create', methods=['POST'])
+@route('/venues/create', methods=['POST'])
 def create_venue_submission():
   # TODO: insert form data as a new Venue record in the db, instead - DONE
   # TODO: modify data to be the data object returned from db insertion - DONE  
 
+  from forms import VenueForm
   form = VenueForm()  # Create the form object here
   if form.validate_on_submit():  # Check if the form is valid
       error = False
@@ -224,7 +249,7 @@ def create_venue_submission():
               flash(f"Error in the {field} field: {error}")
   return render_template('forms/new_venue.html', form=form)  # Re-render the form with errors
 
-@app.route('/venues/<venue_id>', methods=['DELETE'])
+@route('/venues/<venue_id>', methods=['DELETE'])
 def delete_venue(venue_id):
   # TODO: Complete this endpoint for taking a venue_id, and using
   # SQLAlchemy ORM to delete a record. Handle cases where the session commit could fail. - DONE
@@ -248,99 +273,49 @@ def delete_venue(venue_id):
 
 #  Artists
 #  ----------------------------------------------------------------
-@app.route('/artists')
+@route('/artists')
+@read_only
 def artists():
   # TODO: replace with real data returned from querying the database - DONE
-  artists = Artist.query.all()
-  data = []
-  for artist in artists:
-      data.append({
-          "id": artist.id,
-          "name": artist.name 
-      })
-  return render_template('pages/artists.html', artists=data)
-
-@app.route('/artists/search', methods=['POST'])
+  genres = request.args.getlist('genre')  # ?genre=Jazz&genre=Blues: artists with both
+  data = artist_list(genres)
+  return render_template('pages/artists.html', artists=data, genres=genres, all_genres=GENRES)
+
+@route('/artists/search', methods=['POST'])
+@read_only
 def search_artists():
   # TODO: implement search on artists with partial string search. Ensure it is case-insensitive.
   # seach for "A" should return "Guns N Petals", "Matt Quevado", and "The Wild Sax Band".
   # search for "band" should return "The Wild Sax Band". - DONE
   search_term = request.form.get('search_term', '')
-  search_terms = search_term.split(",")  # Split the search term by comma
-  if len(search_terms) == 2:  # Check if both city and state are provided
-      city = search_terms[0].strip()
-      state = search_terms[1].strip()
-      artists = Artist.query.filter(Artist.city.ilike(f"%{city}%"), Artist.state.ilike(f"%{state}%")).all()
-  else:
-      artists = Artist.query.filter(Artist.name.ilike(f"%{search_term}%")).all()
-  response = {
-      "count": len(artists),
-      "data": []
-  }
-  for artist in artists:
-      response["data"].append({
-          "id": artist.id,
-          "name": artist.name,
-          "num_upcoming_shows": len(list(filter(lambda show: show.start_time > datetime.now(), artist.shows)))
-      })
-  return render_template('pages/search_artists.html', results=response, search_term=request.form.get('search_term', ''))
-
-@app.route('/artists/<int:artist_id>')
+  genres = request.values.getlist('genre')  # kept from a genre-filtered listing
+  # "City, State" searches by location
+  response = search_results(Artist, search_term, current_app.config['SEARCH_RESULTS_LIMIT'], genres)
+  return render_template('pages/search_artists.html', results=response, search_term=request.form.get('search_term', ''),
+                         genres=genres)
+
+@route('/artists/<int:artist_id>')
+@read_only
 def show_artist(artist_id):
   # shows the artist page with the given artist_id
   # TODO: replace with real artist data from the artist table, using artist_id - DONE
+  validators = http_cache.validators(Artist, artist_id)  # Indexed lookups of the page version
+  if http_cache.is_fresh(validators):
+      return http_cache.not_modified(validators)
+
   artist = Artist.query.get(artist_id)
   if not artist:
       return render_template('errors/404.html'), 404
 
-  # Use JOINs to fetch past and upcoming shows
-  past_shows_query = db.session.query(Show).join(Venue).filter(Show.artist_id == artist_id).filter(
-      Show.start_time < datetime.now()
-  ).all()
-  past_shows = []
-  for show in past_shows_query:
-      past_shows.append({
-          "venue_id": show.venue_id,
-          "venue_name": show.venue.name,
-          "venue_image_link": show.venue.image_link,
-          "start_time": str(show.start_time)
-      })
-
-  upcoming_shows_query = db.session.query(Show).join(Venue).filter(Show.artist_id == artist_id).filter(
-      Show.start_time > datetime.now()
-  ).all()
-  upcoming_shows = []
-  for show in upcoming_shows_query:
-      upcoming_shows.append({
-          "venue_id": show.venue_id,
-          "venue_name": show.venue.name,
-          "venue_image_link": show.venue.image_link,
-          "start_time": str(show.start_time)
-      })
-
-  data = {
-      "id": artist.id,
-      "name": artist.name,
-      "genres": artist.genres,
-      "city": artist.city,
-      "state": artist.state,
-      "phone": artist.phone,
-      "website": artist.website,
-      "facebook_link": artist.facebook_link,
-      "seeking_venue": artist.seeking_venue,
-      "seeking_description": artist.seeking_description,
-      "image_link": artist.image_link,
-      "past_shows": past_shows,
-      "upcoming_shows": upcoming_shows,
-      "past_shows_count": len(past_shows),
-      "upcoming_shows_count": len(upcoming_shows)
-  }
-  return render_template('pages/show_artist.html', artist=data)
+  data = {**artist_detail(artist), **artist_shows(artist_id)}
+  label_show_times(data['past_shows'] + data['upcoming_shows'])
+  return http_cache.with_validators(render_template('pages/show_artist.html', artist=data), validators)
 
 #  Update
 #  ----------------------------------------------------------------
-@app.route('/artists/<int:artist_id>/edit', methods=['GET'])
+@route('/artists/<int:artist_id>/edit', methods=['GET'])
 def edit_artist(artist_id):
+  from forms import ArtistForm
   form = ArtistForm()
   artist = Artist.query.get(artist_id)  # Fetch the artist from the database
 
@@ -358,14 +333,16 @@ def edit_artist(artist_id):
   form.seeking_venue.data = artist.seeking_venue
   form.seeking_description.data = artist.seeking_description
   form.image_link.data = artist.image_link
+  form.available_times.data = format_availability(artist_slots(artist_id))
   return render_template('forms/edit_artist.html', form=form, artist=artist)
 
-@app.route('/artists/<int:artist_id>/edit', methods=['POST'])
+@route('/artists/<int:artist_id>/edit', methods=['POST'])
 def edit_artist_submission(artist_id):
   # TODO: take values from the form submitted, and update existing
   # artist record with ID <artist_id> using the new attributes
   error = False
   artist = Artist.query.get(artist_id)
+  from forms import ArtistForm
   form = ArtistForm(request.form)
   try:
       artist.name = form.name.data
@@ -379,21 +356,15 @@ def edit_artist_submission(artist_id):
       artist.seeking_description = form.seeking_description.data
       artist.image_link = form.image_link.data
       
-      # Access the available_times data from the form
-      available_times_str = form.available_times.data  
-      
-      # Convert comma-separated string to list of datetime objects
-      available_times = []
-      for time_str in available_times_str.split(","):
-          time_str = time_str.strip()
+      # Replace the artist's availability slots, if the field was submitted; left empty, it clears them
+      if 'available_times' in request.form:
           try:
-              available_times.append(datetime.strptime(time_str, '%Y-%m-%d %H:%M:%S'))
+              slots = parse_availability(form.available_times.data or '')
           except ValueError:
-              # Handle invalid time format (optional)
               flash('Invalid time format in available times. Please use YYYY-MM-DD HH:MM:SS')
               return redirect(url_for('edit_artist', artist_id=artist_id))
-
-      artist.available_times = available_times  # Update the artist's available times
+          set_artist_availability(artist_id, slots)  # only changed slots are written
+      http_cache.touch_counterparts(Artist, artist_id)  # Venue pages show the artist's name and image
       db.session.commit()
   except:
     error = True
@@ -406,8 +377,9 @@ def edit_artist_submission(artist_id):
     flash('Artist was successfully updated!')
   return redirect(url_for('show_artist', artist_id=artist_id))
   
-@app.route('/venues/<int:venue_id>/edit', methods=['GET'])
+@route('/venues/<int:venue_id>/edit', methods=['GET'])
 def edit_venue(venue_id):
+  from forms import VenueForm
   form = VenueForm()
   venue = Venue.query.get(venue_id)  # Fetch the venue from the database
 
@@ -428,12 +400,13 @@ def edit_venue(venue_id):
   form.image_link.data = venue.image_link
   return render_template('forms/edit_venue.html', form=form, venue=venue)
 
-@app.route('/venues/<int:venue_id>/edit', methods=['POST'])
+@route('/venues/<int:venue_id>/edit', methods=['POST'])
 def edit_venue_submission(venue_id):
   # TODO: take values from the form submitted, and update existing
   # venue record with ID <venue_id> using the new attributes - DONE
   error = False
   venue = Venue.query.get(venue_id)
+  from forms import VenueForm
   form = VenueForm(request.form)
   try:
     venue.name = form.name.data
@@ -447,6 +420,7 @@ def edit_venue_submission(venue_id):
     venue.seeking_talent = form.seeking_talent.data
     venue.seeking_description = form.seeking_description.data
     venue.image_link = form.image_link.data
+    http_cache.touch_counterparts(Venue, venue_id)  # Artist pages show the venue's name and image
     db.session.commit()
   except:
     error = True
@@ -462,34 +436,29 @@ def edit_venue_submission(venue_id):
 #  Create Artist
 #  ----------------------------------------------------------------
 
-@app.route('/artists/create', methods=['GET'])
+@route('/artists/create', methods=['GET'])
 def create_artist_form():
+  from forms import ArtistForm
   form = ArtistForm()
   return render_template('forms/new_artist.html', form=form)
 
-@app.route('/artists/create', methods=['POST'])
+@route('/artists/create', methods=['POST'])
 def create_artist_submission():
   # called upon submitting the new artist listing form
   # TODO: insert form data as a new Venue record in the db, instead
   # TODO: modify data to be the data object returned from db insertion
 
+  from forms import ArtistForm
   form = ArtistForm()  # Create the form object here
   if form.validate_on_submit():  # Check if the form is valid
       error = False
       try:
-          # Access the available_times data from the form
-          available_times_str = form.available_times.data  
-          
-          # Convert comma-separated string to list of datetime objects
-          available_times = []
-          for time_str in available_times_str.split(","):
-              time_str = time_str.strip()
-              try:
-                  available_times.append(datetime.strptime(time_str, '%Y-%m-%d %H:%M:%S'))
-              except ValueError:
-                  # Handle invalid time format (optional)
-                  flash('Invalid time format in available times. Please use YYYY-MM-DD HH:MM:SS')
-                  return render_template('forms/new_artist.html', form=form)
+          # Convert the comma-separated available times into availability slots
+          try:
+              slots = parse_availability(form.available_times.data)
+          except ValueError:
+              flash('Invalid time format in available times. Please use YYYY-MM-DD HH:MM:SS')
+              return render_template('forms/new_artist.html', form=form)
 
           artist = Artist(
               name=form.name.data,
@@ -502,7 +471,7 @@ def create_artist_submission():
               website=form.website.data,
               seeking_venue=form.seeking_venue.data,
               seeking_description=form.seeking_description.data,
-              available_times=available_times  # Store the list of datetime objects
+              availability=[Availability(start_time=start, end_time=end) for start, end in slots]
           )
           db.session.add(artist)
           db.session.commit()
@@ -529,34 +498,30 @@ def create_artist_submission():
 #  Shows
 #  ----------------------------------------------------------------
 
-@app.route('/shows')
+@route('/shows')
+@read_only
 def shows():
   # displays list of shows at /shows
   # TODO: replace with real venues data. - DONE
-  shows = Show.query.all()
-  data = []
-  for show in shows:
-      data.append({
-          "venue_id": show.venue_id,
-          "venue_name": show.venue.name,
-          "artist_id": show.artist_id,
-          "artist_name": show.artist.name,
-          "artist_image_link": show.artist.image_link,
-          "start_time": str(show.start_time)
-      })
-  return render_template('pages/shows.html', shows=data)
-
-@app.route('/shows/create')
+  limit = request.args.get('limit', current_app.config['SHOWS_PAGE_SIZE'], type=int)
+  limit = max(1, min(limit, current_app.config['SHOWS_MAX_PAGE_SIZE']))
+  data, next_cursor = show_feed(request.args.get('after'), limit)
+  label_show_times(data)
+  return render_template('pages/shows.html', shows=data, next_cursor=next_cursor, limit=limit)
+
+@route('/shows/create')
 def create_shows():
   # renders form. do not touch.
+  from forms import ShowForm
   form = ShowForm()
   return render_template('forms/new_show.html', form=form)
 
-@app.route('/shows/create', methods=['POST'])
+@route('/shows/create', methods=['POST'])
 def create_show_submission():
   # called to create new shows in the db, upon submitting new show listing form - DONE
   # TODO: insert form data as a new Show record in the db, instead - DONE
   error = False
+  from forms import ShowForm
   form = ShowForm(request.form)
   try:
       artist = Artist.query.get(form.artist_id.data)
@@ -570,13 +535,13 @@ def create_show_submission():
           return redirect(url_for('create_shows'))
 
       show_time = form.start_time.data
-      artist_available_times = artist.available_times
-      if artist_available_times is None:  # Check if available_times is None
-          flash('Artist has no available times set.')
+      if not is_available(artist.id, show_time):  # Indexed lookup of the slot containing show_time
+          flash('Show time is outside of the artist\'s availability.')
           return redirect(url_for('create_shows'))
 
-      if str(show_time) not in artist_available_times:
-          flash('Show time is outside of the artist\'s availability.')
+      conflict = find_conflict(venue.id, artist.id, show_time)  # Indexed overlap probe
+      if conflict:
+          flash(f'The venue or artist is already booked for a show at {conflict.start_time}.')
           return redirect(url_for('create_shows'))
 
       show = Show(
@@ -585,11 +550,18 @@ def create_show_submission():
           start_time=form.start_time.data
       )
       db.session.add(show)
+      record_shows([(venue.id, artist.id, show_time)])  # Upcoming/past counters of both sides
       db.session.commit()
-  except Exception as e:
+  except IntegrityError as e:
+      # A concurrent booking got there first; the exclusion constraint rejected this one
+      db.session.rollback()
+      current_app.logger.warning(f"Error creating show: {e}")
+      flash('The venue or artist was just booked for an overlapping show.')
+      return redirect(url_for('create_shows'))
+  except Exception:
       error = True
       db.session.rollback()
-      print(f"Error creating show: {e}")
+      current_app.logger.exception("Error creating show")
   finally:
       db.session.close()
   if error:
@@ -598,36 +570,51 @@ def create_show_submission():
       flash('Show was successfully listed!')
   return render_template('pages/home.html')
 
-@app.errorhandler(404)
+#  Metrics
+#  ----------------------------------------------------------------
+
+@route('/metrics/pool')
+@internal
+def pool_metrics():
+  # connection pool usage of this worker process
+  return jsonify(dbpool.snapshot(db.engines))
+
+@route('/metrics/queries')
+@internal
+def query_metrics():
+  # SQL statements per endpoint in this worker process, from the query profiler
+  return jsonify(profiler.snapshot())
+
+@route('/metrics/templates')
+@internal
+def template_metrics():
+  # render_template calls per template in this worker process
+  return jsonify(rendering.snapshot())
+
+@errorhandler(404)
 def not_found_error(error):
     return render_template('errors/404.html'), 404
 
-@app.errorhandler(500)
+@errorhandler(500)
 def server_error(error):
     return render_template('errors/500.html'), 500
 
 
-if not app.debug:
-    file_handler = FileHandler('error.log')
-    file_handler.setFormatter(
-        Formatter('%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
-    )
-    app.logger.setLevel(logging.INFO)
-    file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
-    app.logger.info('errors')
-
 #----------------------------------------------------------------------------#
 # Launch.
 #----------------------------------------------------------------------------#
 
+# Async serving of the read-heavy pages: uvicorn asgi:application (see asgi.py)
+
+# Preforking servers: gunicorn --preload wsgi:app (see wsgi.py)
+
 # Default port:
 if __name__ == '__main__':
-    app.run()
+    create_app().run()
 
 # Or specify port manually:
 '''
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port)
+    create_app().run(host='0.0.0.0', port=port)
 '''
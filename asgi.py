@@ -0,0 +1,263 @@
+import io
+import sys
+from datetime import datetime
+
+from flask import render_template, request
+from sqlalchemy.engine import make_url
+from werkzeug.exceptions import HTTPException
+
+from app import app
+from cache import cache
+from formatting import label_show_times
+import http_cache
+from models import Venue, Artist, Show
+from queries import (
+    recent_listings_query, build_listing, venue_areas_query, build_areas, artist_list_query,
+    show_feed_query, decode_cursor, build_show_feed, detail_shows_query, split_shows,
+    venue_detail, artist_detail
+)
+from search import parse_search_term, search_engine, build_results
+from startup import warm_up
+from validation import GENRES
+
+try:
+    from asgiref.wsgi import WsgiToAsgi
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+except ImportError:  # optional, see below
+    WsgiToAsgi = None
+
+#----------------------------------------------------------------------------#
+# ASGI serving mode.
+#----------------------------------------------------------------------------#
+# `uvicorn asgi:application` serves the read-heavy pages (home, listings, shows,
+# venue/artist pages and search) from coroutine views on SQLAlchemy's asyncio
+# engine, so one process overlaps the Postgres round trips of many requests.
+# Every other route, and any request these views do not match, is handed to the
+# unchanged WSGI app in a worker thread. Needs requirements-optional.txt.
+#
+# The async views run the same statement builders and row shapers as the sync
+# ones (queries.py, search.py, http_cache.py) inside a normal Flask request
+# context, so before/after_request hooks, the session cookie, the result cache
+# and the query profiler behave as under WSGI. Only the queries are awaited;
+# templates still render synchronously.
+#
+# The async engine has its own pool, sized by SQLALCHEMY_ENGINE_OPTIONS like the
+# sync one; size the database's max_connections for both.
+
+ENGINE_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout', 'pool_recycle', 'pool_pre_ping')
+
+
+def create_engine_for(flask_app):
+    """An asyncpg engine for the app's PostgreSQL database."""
+    if WsgiToAsgi is None:
+        raise RuntimeError('The ASGI mode needs asgiref and asyncpg; pip install -r requirements-optional.txt.')
+    url = make_url(flask_app.config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() != 'postgresql':
+        raise RuntimeError('The ASGI mode needs a PostgreSQL database.')
+    configured = flask_app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    options = {name: configured[name] for name in ENGINE_OPTIONS if name in configured}
+    timeout = flask_app.config.get('DB_STATEMENT_TIMEOUT')
+    if timeout:
+        options['connect_args'] = {'server_settings': {'statement_timeout': str(timeout)}}
+    return create_async_engine(url.set(drivername='postgresql+asyncpg'), **options)
+
+
+warm_up(app)
+engine = create_engine_for(app)
+Session = async_sessionmaker(engine, expire_on_commit=False)
+dialect_name = engine.dialect.name
+wsgi_application = WsgiToAsgi(app)
+urls = app.url_map.bind('localhost')
+
+#  Views
+#  ----------------------------------------------------------------
+# Registered per endpoint of app.py; each takes an AsyncSession and the view
+# arguments of the route, and returns anything a Flask view may return.
+
+VIEWS = {}
+
+
+def async_view(endpoint):
+    def register(view):
+        VIEWS[endpoint] = view
+        return view
+    return register
+
+
+@async_view('index')
+async def index(session):
+    async def recent_listings():
+        return {
+            "artists": build_listing(await session.execute(recent_listings_query(Artist))),
+            "venues": build_listing(await session.execute(recent_listings_query(Venue))),
+        }
+    recent = await cache.get_or_set_async('home', recent_listings, depends_on=(Artist, Venue))
+    return render_template('pages/home.html', artists=recent['artists'], venues=recent['venues'])
+
+
+@async_view('venues')
+async def venues(session):
+    genres = request.args.getlist('genre')
+    areas = build_areas(await session.execute(venue_areas_query(genres)))
+    return render_template('pages/venues.html', areas=areas, genres=genres, all_genres=GENRES)
+
+
+@async_view('artists')
+async def artists(session):
+    genres = request.args.getlist('genre')
+    data = build_listing(await session.execute(artist_list_query(genres)))
+    return render_template('pages/artists.html', artists=data, genres=genres, all_genres=GENRES)
+
+
+@async_view('shows')
+async def shows(session):
+    limit = request.args.get('limit', app.config['SHOWS_PAGE_SIZE'], type=int)
+    limit = max(1, min(limit, app.config['SHOWS_MAX_PAGE_SIZE']))
+    cursor = request.args.get('after')
+    query = show_feed_query(decode_cursor(cursor) if cursor else None, limit + 1)
+    data, next_cursor = build_show_feed((await session.execute(query)).all(), limit)
+    label_show_times(data)
+    return render_template('pages/shows.html', shows=data, next_cursor=next_cursor, limit=limit)
+
+
+async def _detail_page(session, model, entity_id, detail, key, other, prefix, template):
+    validators = http_cache.page_validators(
+        model, entity_id, (await session.execute(http_cache.version_query(model, entity_id))).first()
+    )
+    if http_cache.is_fresh(validators):
+        return http_cache.not_modified(validators)
+    entity = await session.get(model, entity_id)
+    if not entity:
+        return render_template('errors/404.html'), 404
+    rows = await session.execute(detail_shows_query(key, entity_id, other))
+    data = {**detail(entity), **split_shows(rows, prefix, datetime.now())}
+    label_show_times(data['past_shows'] + data['upcoming_shows'])
+    page = render_template(template, **{model.__tablename__.lower(): data})
+    return http_cache.with_validators(page, validators)
+
+
+@async_view('show_venue')
+async def show_venue(session, venue_id):
+    return await _detail_page(session, Venue, venue_id, venue_detail, Show.venue_id, Artist, 'artist',
+                              'pages/show_venue.html')
+
+
+@async_view('show_artist')
+async def show_artist(session, artist_id):
+    return await _detail_page(session, Artist, artist_id, artist_detail, Show.artist_id, Venue, 'venue',
+                              'pages/show_artist.html')
+
+
+async def _search_page(session, model, template):
+    search_term = request.form.get('search_term', '')
+    genres = request.values.getlist('genre')
+    limit = app.config['SEARCH_RESULTS_LIMIT']
+    engine, terms = search_engine(dialect_name), parse_search_term(search_term)
+    matches = (await session.scalars(engine.query(model, terms, limit + 1, genres))).all()
+    results = build_results(engine.rank(matches, terms, limit + 1), limit)
+    return render_template(template, results=results, search_term=search_term, genres=genres)
+
+
+@async_view('search_venues')
+async def search_venues(session):
+    return await _search_page(session, Venue, 'pages/search_venues.html')
+
+
+@async_view('search_artists')
+async def search_artists(session):
+    return await _search_page(session, Artist, 'pages/search_artists.html')
+
+#  ASGI application
+#  ----------------------------------------------------------------
+
+def _endpoint(scope):
+    """The endpoint of app.py a request is routed to, or None."""
+    try:
+        endpoint, _ = urls.match(scope['path'], scope['method'])
+    except HTTPException:  # 404, 405 and redirects are answered by the WSGI app
+        return None
+    return endpoint
+
+
+def _environ(scope, body):
+    """The WSGI environ of an ASGI HTTP request."""
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf8').decode('latin1'),
+        'PATH_INFO': scope['path'].encode('utf8').decode('latin1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.input_terminated': True,  # the whole body has been read, chunked or not
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name, value = name.decode('latin1').upper().replace('-', '_'), value.decode('latin1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        environ[name] = f'{environ[name]},{value}' if name in environ else value
+    return environ
+
+
+async def _body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    return b''.join(chunks)
+
+
+async def _dispatch(view, environ):
+    """Run an async view through Flask's request handling, like ``Flask.wsgi_app``."""
+    with app.request_context(environ):
+        try:
+            try:
+                response = app.preprocess_request()
+                if response is None:
+                    async with Session() as session:
+                        response = await view(session, **request.view_args)
+            except Exception as error:
+                response = app.handle_user_exception(error)
+            response = app.finalize_request(response)
+        except Exception as error:
+            response = app.handle_exception(error)
+        return response.status_code, response.headers.to_wsgi_list(), response.get_data()
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await engine.dispose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+    view = VIEWS.get(_endpoint(scope)) if scope['type'] == 'http' else None
+    if view is None:
+        return await wsgi_application(scope, receive, send)
+    status, headers, body = await _dispatch(view, _environ(scope, await _body(receive)))
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in headers],
+    })
+    await send({'type': 'http.response.body', 'body': b'' if scope['method'] == 'HEAD' else body})
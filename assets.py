@@ -0,0 +1,285 @@
+import gzip
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import re
+import shutil
+
+import click
+from flask import current_app, request, send_from_directory, url_for
+from flask.cli import AppGroup
+from werkzeug.security import safe_join
+
+#----------------------------------------------------------------------------#
+# Static assets.
+#----------------------------------------------------------------------------#
+# `flask assets build` concatenates and minifies the stylesheets and scripts of
+# the layout into a few bundles and copies the other assets the pages link to.
+# Images get resized JPEG and WebP variants. Every output file is named after
+# a hash of its content and pre-compressed with gzip, and with Brotli when the
+# brotli package is installed. The files and static/dist/manifest.json, which
+# maps logical names to the hashed ones, are written to static/dist.
+#
+# With ASSETS_BUNDLED set, templates link the hashed files through asset_urls(),
+# asset_url() and image_srcset(). They are served from /static/dist in the
+# encoding the client accepts, with an immutable one-year Cache-Control. A new
+# build renames changed files, so clients never keep stale copies. Without a
+# build, or with ASSETS_BUNDLED off (the default in DEBUG), the helpers return
+# the source files. Processes read the manifest once; restart them after a build.
+#
+# Optional build dependencies: brotli (.br files), Pillow (image variants) and
+# rjsmin (minification of unminified scripts), listed in requirements-optional.txt.
+
+BUNDLES = {
+    'main.css': [
+        'css/bootstrap.min.css',
+        'css/layout.main.css',
+        'css/main.css',
+        'css/main.responsive.css',
+        'css/main.quickfix.css',
+    ],
+    'head.js': ['js/libs/modernizr-2.8.2.min.js', 'js/libs/moment.min.js'],
+    'main.js': ['js/libs/bootstrap-3.1.1.min.js', 'js/plugins.js', 'js/script.js'],
+}
+FILES = ['js/libs/jquery-1.11.1.min.js', 'js/libs/respond-1.4.2.min.js']
+IMAGES = {'img/front-splash.jpg': (480, 960, 1440)}  # widths of the variants
+IMAGE_FORMATS = {'jpg': ('JPEG', {'quality': 80, 'optimize': True, 'progressive': True}),
+                 'webp': ('WEBP', {'quality': 75, 'method': 6})}
+COMPRESSED = ('.css', '.js', '.svg', '.json', '.map', '.ttf', '.otf', '.eot')
+DIST = 'dist'
+MANIFEST = 'manifest.json'
+HASH_LENGTH = 12
+
+assets_cli = AppGroup('assets', help='Build the bundled, fingerprinted static assets.')
+
+#  Minification
+#  ----------------------------------------------------------------
+
+# Strings and /*! license */ comments are kept, other comments and whitespace are not
+_CSS_TOKENS = re.compile(r'("(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|/\*!.*?\*/)|/\*.*?\*/|\s+', re.S)
+_CSS_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+_CSS_URLS = re.compile(r'url\(\s*(["\']?)([^"\')]+)\1\s*\)')
+_SOURCE_MAPS = re.compile(r'^[ \t]*//[#@] sourceMappingURL=.*$', re.M)
+
+
+def minify_css(css):
+    """Drop comments and redundant whitespace, leaving strings as they are."""
+    output, code, last = [], [], 0
+
+    def flush():
+        text = _CSS_PUNCTUATION.sub(r'\1', ''.join(code))
+        output.append(re.sub(r'\s+', ' ', text).replace(';}', '}'))
+        code.clear()
+
+    for match in _CSS_TOKENS.finditer(css):
+        code.append(css[last:match.start()])
+        if match.group(1):
+            flush()
+            output.append(match.group(1))
+        else:
+            code.append(' ')
+        last = match.end()
+    code.append(css[last:])
+    flush()
+    return ''.join(output).strip()
+
+
+def minify_js(js, name):
+    js = _SOURCE_MAPS.sub('', js)  # the maps do not match the bundle
+    if name.endswith('.min.js'):
+        return js
+    try:
+        import rjsmin
+    except ImportError:
+        return js
+    return rjsmin.jsmin(js)
+
+#  Build
+#  ----------------------------------------------------------------
+
+class Builder:
+    """Writes hashed (and compressed) files into ``dist`` and records them in ``manifest``."""
+
+    def __init__(self, static_folder):
+        self.static_folder = static_folder
+        self.dist = os.path.join(static_folder, DIST)
+        self.manifest = {}
+        try:
+            import brotli
+        except ImportError:
+            brotli = None
+        self.brotli = brotli
+
+    def source(self, name):
+        with open(os.path.join(self.static_folder, name), 'rb') as source:
+            return source.read()
+
+    def emit(self, name, data):
+        """Write ``data`` as the hashed version of ``name``; returns the hashed name."""
+        if name in self.manifest:
+            return self.manifest[name]
+        root, ext = os.path.splitext(name)
+        hashed = f'{root}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}'
+        path = os.path.join(self.dist, hashed)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as output:
+            output.write(data)
+        if ext in COMPRESSED:
+            with open(path + '.gz', 'wb') as output:
+                output.write(gzip.compress(data, compresslevel=9, mtime=0))
+            if self.brotli is not None:
+                with open(path + '.br', 'wb') as output:
+                    output.write(self.brotli.compress(data))
+        self.manifest[name] = hashed
+        return hashed
+
+    def _rewrite_urls(self, css, name, bundle):
+        """Point the url()s of stylesheet ``name`` at hashed copies, relative to ``bundle``."""
+        source_dir = os.path.dirname(name)
+        bundle_dir = os.path.dirname(bundle)
+
+        def rewrite(match):
+            url = match.group(2)
+            if re.match(r'^(?:[a-z]+:|/|#)', url):
+                return match.group(0)
+            path, suffix = re.match(r'([^?#]*)(.*)', url).groups()
+            target = os.path.normpath(os.path.join(source_dir, path)).replace(os.sep, '/')
+            if os.path.isfile(os.path.join(self.static_folder, target)):
+                target = f'{DIST}/' + self.emit(target, self.source(target))
+            relative = os.path.relpath(target, f'{DIST}/{bundle_dir}' if bundle_dir else DIST)
+            return f'url("{relative.replace(os.sep, "/")}{suffix}")'
+        return _CSS_URLS.sub(rewrite, css)
+
+    def bundle(self, name, sources):
+        if name.endswith('.css'):
+            parts = [self._rewrite_urls(minify_css(self.source(source).decode('utf-8')), source, name)
+                     for source in sources]
+            return self.emit(name, '\n'.join(parts).encode('utf-8'))
+        parts = [minify_js(self.source(source).decode('utf-8'), source).rstrip().rstrip(';')
+                 for source in sources]
+        return self.emit(name, (';\n'.join(parts) + ';\n').encode('utf-8'))
+
+    def image(self, name, widths):
+        """Resized variants of an image, named like img/photo-960.webp; needs Pillow."""
+        try:
+            from PIL import Image
+        except ImportError:
+            click.echo(f'Pillow is not installed; {name} is copied as it is.')
+            return
+        root, _ = os.path.splitext(name)
+        with Image.open(os.path.join(self.static_folder, name)) as original:
+            original = original.convert('RGB')
+            for width in widths:
+                width = min(width, original.width)
+                resized = original.resize((width, round(original.height * width / original.width)), Image.LANCZOS)
+                for ext, (format, options) in IMAGE_FORMATS.items():
+                    output = io.BytesIO()
+                    resized.save(output, format, **options)
+                    self.emit(f'{root}-{width}.{ext}', output.getvalue())
+
+    def build(self):
+        shutil.rmtree(self.dist, ignore_errors=True)
+        for name, sources in BUNDLES.items():
+            self.bundle(name, sources)
+        for name, widths in IMAGES.items():
+            self.image(name, widths)
+            # the fallback <img> is the largest JPEG variant, or the original
+            largest = f'{os.path.splitext(name)[0]}-{max(widths)}.jpg'
+            self.manifest[name] = self.manifest.get(largest) or self.emit(name, self.source(name))
+        for name in FILES:
+            self.emit(name, self.source(name))
+        with open(os.path.join(self.dist, MANIFEST), 'w') as output:
+            json.dump(self.manifest, output, indent=2, sort_keys=True)
+        return self.manifest
+
+
+@assets_cli.command('build')
+def build_command():
+    """Bundle, minify, fingerprint and pre-compress the static assets."""
+    builder = Builder(current_app.static_folder)
+    manifest = builder.build()
+    sources = {source for sources in BUNDLES.values() for source in sources} | set(FILES) | set(IMAGES)
+    before = sum(os.path.getsize(os.path.join(builder.static_folder, source)) for source in sources)
+    after = sum(os.path.getsize(os.path.join(builder.dist, hashed)) for hashed in set(manifest.values()))
+    click.echo(f'{len(manifest)} files written to {builder.dist} ({before:,} bytes of sources, {after:,} built).')
+
+#  Serving
+#  ----------------------------------------------------------------
+
+class Assets:
+    """Flask extension serving the built assets and the template helpers linking them."""
+
+    def __init__(self, app=None):
+        self._manifests = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['assets'] = self
+        app.add_url_rule(f'{app.static_url_path}/{DIST}/<path:filename>', 'assets', self.send)
+        app.add_template_global(self.asset_urls, 'asset_urls')
+        app.add_template_global(self.asset_url, 'asset_url')
+        app.add_template_global(self.image_srcset, 'image_srcset')
+
+    def manifest(self):
+        """The manifest of the current build, or None when assets are not bundled."""
+        app = current_app._get_current_object()
+        if not app.config.get('ASSETS_BUNDLED'):
+            return None
+        if app not in self._manifests:
+            try:
+                with open(os.path.join(app.static_folder, DIST, MANIFEST)) as source:
+                    self._manifests[app] = json.load(source)
+            except FileNotFoundError:
+                app.logger.warning('ASSETS_BUNDLED is set but no build was found; run `flask assets build`.')
+                self._manifests[app] = None
+        return self._manifests[app]
+
+    def asset_url(self, name):
+        """URL of a static file, hashed when it has been built."""
+        manifest = self.manifest()
+        if manifest and name in manifest:
+            return url_for('assets', filename=manifest[name])
+        return url_for('static', filename=name)
+
+    def asset_urls(self, bundle):
+        """URLs to link for a bundle: the built file, or its sources."""
+        manifest = self.manifest()
+        if manifest and bundle in manifest:
+            return [url_for('assets', filename=manifest[bundle])]
+        return [url_for('static', filename=source) for source in BUNDLES[bundle]]
+
+    def image_srcset(self, name, ext=None):
+        """A srcset of the built variants of an image in ``ext`` (its own format by default), or ''."""
+        manifest = self.manifest() or {}
+        root, own_ext = os.path.splitext(name)
+        ext = ext or own_ext.lstrip('.')
+        candidates = []
+        for width in IMAGES.get(name, ()):
+            hashed = manifest.get(f'{root}-{width}.{ext}')
+            if hashed:
+                candidates.append(f"{url_for('assets', filename=hashed)} {width}w")
+        return ', '.join(candidates)
+
+    def send(self, filename):
+        """A built file, pre-compressed in the best encoding the client accepts."""
+        dist = os.path.join(current_app.static_folder, DIST)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        max_age = current_app.config.get('ASSETS_MAX_AGE', 31536000)
+        for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+            path = safe_join(dist, filename + suffix)
+            if request.accept_encodings[encoding] and path and os.path.isfile(path):
+                response = send_from_directory(dist, filename + suffix, mimetype=mimetype, max_age=max_age)
+                response.content_encoding = encoding
+                break
+        else:
+            response = send_from_directory(dist, filename, mimetype=mimetype, max_age=max_age)
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+
+assets = Assets()
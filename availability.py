@@ -0,0 +1,137 @@
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from models import db, Availability
+
+#----------------------------------------------------------------------------#
+# Artist availability.
+#----------------------------------------------------------------------------#
+# Availability is stored as [start_time, end_time) rows per artist. The rows
+# of one artist never overlap (they are merged on write), so "is artist X free
+# at T" is a single descending probe of the (artist_id, start_time) index, and
+# "which artists are free in W" a range-containment search of the GiST index
+# on tsrange(start_time, end_time) on PostgreSQL.
+#
+# In the form and import files availability is a comma-separated list whose
+# entries are either a single start time, a slot of SLOT_LENGTH, or an
+# explicit "start/end" range.
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+SLOT_LENGTH = timedelta(hours=1)
+
+
+def parse_availability(text, slot_length=SLOT_LENGTH):
+    """Parse form/import text into merged (start, end) slots; raises ValueError."""
+    slots = []
+    for entry in text.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        if '/' in entry:
+            start, end = (datetime.strptime(part.strip(), TIME_FORMAT) for part in entry.split('/', 1))
+            if end <= start:
+                raise ValueError(f'Availability ends before it starts: {entry}')
+        else:
+            start = datetime.strptime(entry, TIME_FORMAT)
+            end = start + slot_length
+        slots.append((start, end))
+    return merge_slots(slots)
+
+
+def format_availability(slots, slot_length=SLOT_LENGTH):
+    """The inverse of ``parse_availability``, for pre-filling the edit form."""
+    entries = []
+    for start, end in slots:
+        if end - start == slot_length:
+            entries.append(start.strftime(TIME_FORMAT))
+        else:
+            entries.append(f'{start.strftime(TIME_FORMAT)}/{end.strftime(TIME_FORMAT)}')
+    return ', '.join(entries)
+
+
+def merge_slots(slots):
+    """Sort slots and merge those that overlap or touch."""
+    merged = []
+    for start, end in sorted(slots):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def artist_slots(artist_id):
+    query = (
+        db.select(Availability.start_time, Availability.end_time)
+        .where(Availability.artist_id == artist_id)
+        .order_by(Availability.start_time)
+    )
+    return [tuple(row) for row in db.session.execute(query)]
+
+
+def set_artist_availability(artist_id, slots):
+    """Replace an artist's availability, touching only the slots that changed.
+
+    Adds to the session without committing.
+    """
+    wanted = set(merge_slots(slots))
+    existing = {
+        (row.start_time, row.end_time): row
+        for row in db.session.scalars(db.select(Availability).where(Availability.artist_id == artist_id))
+    }
+    for slot, row in existing.items():
+        if slot not in wanted:
+            db.session.delete(row)
+    for start, end in wanted - existing.keys():
+        db.session.add(Availability(artist_id=artist_id, start_time=start, end_time=end))
+
+
+def is_available(artist_id, at):
+    """Whether ``at`` falls inside one of the artist's availability slots."""
+    end_time = db.session.scalar(
+        db.select(Availability.end_time)
+        .where(Availability.artist_id == artist_id, Availability.start_time <= at)
+        .order_by(Availability.start_time.desc())
+        .limit(1)
+    )
+    return end_time is not None and end_time > at
+
+
+class AvailabilityIndex:
+    """The availability slots of all artists in memory, for checking many show times.
+
+    ``covers`` answers like ``is_available`` with one bisection of the
+    artist's slots.
+    """
+
+    def __init__(self, rows=()):
+        self.starts = defaultdict(list)
+        self.ends = defaultdict(list)
+        for artist_id, start, end in sorted(rows):
+            self.starts[artist_id].append(start)
+            self.ends[artist_id].append(end)
+
+    @classmethod
+    def load(cls):
+        return cls(db.session.execute(
+            db.select(Availability.artist_id, Availability.start_time, Availability.end_time)
+        ))
+
+    def covers(self, artist_id, at):
+        i = bisect_right(self.starts.get(artist_id, ()), at) - 1
+        return i >= 0 and self.ends[artist_id][i] > at
+
+
+def available_artists_query(start, end):
+    """Ids of artists with one slot covering all of [start, end)."""
+    if db.engine.dialect.name == 'postgresql':
+        period = db.func.tsrange(Availability.start_time, Availability.end_time)
+        covers = period.op('@>')(db.func.tsrange(start, end))
+    else:
+        covers = db.and_(Availability.start_time <= start, Availability.end_time >= end)
+    return db.select(Availability.artist_id).where(covers)
+
+
+def available_artists(start, end):
+    return db.session.scalars(available_artists_query(start, end)).all()
@@ -0,0 +1,119 @@
+"""Show the query plans of the Show-heavy pages with and without the Show indexes.
+
+    python -m benchmarks.query_plans [--venues 500] [--artists 500] [--shows 200000]
+
+Runs against SQLALCHEMY_DATABASE_URI (PostgreSQL) inside a single transaction
+that is rolled back: synthetic venues, artists and shows are inserted, the
+planner statistics refreshed, and each query is EXPLAINed and timed once with
+the indexes declared on Show and once after dropping them. Exits non-zero if
+a detail-page, feed or counter rollover query does not use an index on Show.
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app import app
+from models import db, Venue, Artist, Show
+from counters import rollover_counts_query
+from queries import detail_shows_query, show_feed_query
+
+INDEX_SCANS = ('Index Scan', 'Index Only Scan', 'Bitmap Index Scan')
+
+
+def seed(conn, venues, artists, shows):
+    venue_ids = conn.execute(text("""
+        INSERT INTO "Venue" (name, city, state, address, phone, genres)
+        SELECT 'plan-bench venue ' || g, 'City ' || (g % 50), 'CA', 'Address', '555-555-5555', ARRAY['Jazz']
+        FROM generate_series(1, :n) g RETURNING id
+    """), {'n': venues}).scalars().all()
+    artist_ids = conn.execute(text("""
+        INSERT INTO "Artist" (name, city, state, phone, genres)
+        SELECT 'plan-bench artist ' || g, 'City ' || (g % 50), 'CA', '555-555-5555', ARRAY['Jazz']
+        FROM generate_series(1, :n) g RETURNING id
+    """), {'n': artists}).scalars().all()
+    # One show an hour, spread over past and future, rotating venues and artists.
+    conn.execute(text("""
+        INSERT INTO "Show" (venue_id, artist_id, start_time)
+        SELECT (:venue_ids)[1 + (g * 7) % :nv], (:artist_ids)[1 + g % :na],
+               localtimestamp + (g - :n / 2) * interval '1 hour'
+        FROM generate_series(1, :n) g
+    """), {'venue_ids': venue_ids, 'artist_ids': artist_ids,
+           'nv': len(venue_ids), 'na': len(artist_ids), 'n': shows})
+    conn.execute(text('ANALYZE "Venue", "Artist", "Show"'))
+    return venue_ids, artist_ids
+
+
+def explain(conn, statement, repeat=20):
+    """Scans over the Show table in the plan, and the mean execution time in ms."""
+    compiled = statement.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+    plan = conn.exec_driver_sql('EXPLAIN (FORMAT JSON) ' + str(compiled), compiled.params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        conn.exec_driver_sql(str(compiled), compiled.params).all()
+    elapsed = (time.perf_counter() - start) * 1000 / repeat
+
+    def scans(node):
+        if node.get('Relation Name') == 'Show' or node.get('Index Name', '').startswith('ix_Show_'):
+            yield node['Node Type'], node.get('Index Name')
+        for child in node.get('Plans', []):
+            yield from scans(child)
+    return list(scans(plan[0]['Plan'])), elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--venues', type=int, default=500)
+    parser.add_argument('--artists', type=int, default=500)
+    parser.add_argument('--shows', type=int, default=200000)
+    args = parser.parse_args(argv)
+
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            sys.exit('query_plans needs a PostgreSQL SQLALCHEMY_DATABASE_URI')
+        with db.engine.connect() as conn:
+            trans = conn.begin()
+            try:
+                venue_ids, artist_ids = seed(conn, args.venues, args.artists, args.shows)
+                now = datetime.now()
+                # (name, statement, must use an index on Show)
+                queries = [
+                    ('venue detail', detail_shows_query(Show.venue_id, venue_ids[0], Artist), True),
+                    ('artist detail', detail_shows_query(Show.artist_id, artist_ids[0], Venue), True),
+                    ('show feed', show_feed_query((now, 0), 50), True),
+                    ('counter rollover', rollover_counts_query(Show.venue_id, now - timedelta(minutes=15), now), True),
+                ]
+                indexes = sorted(Show.__table__.indexes, key=lambda index: index.name)
+                for index in indexes:
+                    index.create(conn, checkfirst=True)
+
+                results = {}
+                for name, statement, _ in queries:
+                    results[name] = [explain(conn, statement)]
+                for index in indexes:
+                    index.drop(conn)
+                for name, statement, _ in queries:
+                    results[name].append(explain(conn, statement))
+            finally:
+                trans.rollback()
+
+    failed = False
+    for name, _, required in queries:
+        (with_scans, with_ms), (without_scans, without_ms) = results[name]
+        uses_index = any(node in INDEX_SCANS for node, _ in with_scans)
+        failed |= required and not uses_index
+        print(f'{name}:')
+        print(f'  with indexes    {with_ms:8.2f} ms  {with_scans}')
+        print(f'  without indexes {without_ms:8.2f} ms  {without_scans}')
+        if required and not uses_index:
+            print('  FAIL: no index scan on Show')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
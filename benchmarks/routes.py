@@ -0,0 +1,259 @@
+"""Benchmark every Fyyur route at several data scales against a baseline.
+
+    python -m benchmarks.routes --database-url postgresql://localhost/fyyur_bench
+        [--scale small medium] [--requests 50] [--baseline benchmarks/baseline.json]
+        [--write-baseline] [--output results.json]
+
+For each scale the benchmark database (which must not be the app's own
+DATABASE_URL: its tables are dropped) is recreated and loaded with a
+synthetic dataset from synthetic.py (seed 0). Every route of app.py and of the
+JSON API (api.py) is then driven through the Flask test client. The run records latency percentiles, the SQL statements
+per request (from the query profiler) and the peak memory allocated while
+serving one request.
+
+Against a baseline file the run fails if any route issues more statements
+than recorded, or if the p95 latency of a GATED route grows by more than
+--tolerance. --write-baseline records the current run as the new baseline.
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+# (venues, artists, shows)
+SCALES = {
+    'small': (100, 100, 2000),
+    'medium': (1000, 1000, 50000),
+    'large': (5000, 5000, 500000),
+}
+GATED = ('venues', 'shows', 'search_venues', 'search_artists')
+LATENCY_SLACK_MS = 1.0  # p95 growth below this is timer noise, whatever the tolerance
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+#  Routes
+#  ----------------------------------------------------------------
+# (name, method, request builder). A builder takes the run context and the
+# request number and returns (path, form data).
+
+def _venue_form(name):
+    return {'name': name, 'city': 'San Francisco', 'state': 'CA', 'address': '1 Bench St',
+            'phone': '555-555-5555', 'genres': ['Jazz'], 'seeking_description': ''}
+
+
+def _artist_form(name):
+    return {'name': name, 'city': 'San Francisco', 'state': 'CA', 'phone': '555-555-5555',
+            'genres': ['Jazz'], 'seeking_description': ''}
+
+
+def _pick(rows, i):
+    return rows[i % len(rows)]
+
+
+def _create_show(ctx, i):
+    # Three hours apart, clear of the seeded shows and of each other
+    start = ctx['now'] + timedelta(days=5 * 365, hours=3 * i)
+    return '/shows/create', {'venue_id': _pick(ctx['venues'], i)[0], 'artist_id': _pick(ctx['artists'], i)[0],
+                             'start_time': start.strftime('%Y-%m-%d %H:%M:%S')}
+
+
+ROUTES = [
+    ('index', 'GET', lambda ctx, i: ('/', None)),
+    ('venues', 'GET', lambda ctx, i: ('/venues', None)),
+    ('search_venues', 'POST', lambda ctx, i: ('/venues/search', {'search_term': 'blue'})),
+    ('show_venue', 'GET', lambda ctx, i: (f"/venues/{_pick(ctx['venues'], i)[0]}", None)),
+    ('artists', 'GET', lambda ctx, i: ('/artists', None)),
+    ('search_artists', 'POST', lambda ctx, i: ('/artists/search', {'search_term': 'neon'})),
+    ('show_artist', 'GET', lambda ctx, i: (f"/artists/{_pick(ctx['artists'], i)[0]}", None)),
+    ('shows', 'GET', lambda ctx, i: ('/shows', None)),
+    ('create_venue_form', 'GET', lambda ctx, i: ('/venues/create', None)),
+    ('create_venue_submission', 'POST', lambda ctx, i: ('/venues/create', _venue_form(f'bench created venue {i}'))),
+    ('edit_venue', 'GET', lambda ctx, i: (f"/venues/{_pick(ctx['venues'], i)[0]}/edit", None)),
+    ('edit_venue_submission', 'POST', lambda ctx, i: (
+        f"/venues/{_pick(ctx['venues'], i)[0]}/edit", _venue_form(_pick(ctx['venues'], i)[1]))),
+    ('create_artist_form', 'GET', lambda ctx, i: ('/artists/create', None)),
+    ('create_artist_submission', 'POST', lambda ctx, i: ('/artists/create', {
+        **_artist_form(f'bench created artist {i}'), 'available_times': '2035-01-01 20:00:00'})),
+    ('edit_artist', 'GET', lambda ctx, i: (f"/artists/{_pick(ctx['artists'], i)[0]}/edit", None)),
+    ('edit_artist_submission', 'POST', lambda ctx, i: (
+        f"/artists/{_pick(ctx['artists'], i)[0]}/edit", _artist_form(_pick(ctx['artists'], i)[1]))),
+    ('create_shows', 'GET', lambda ctx, i: ('/shows/create', None)),
+    ('create_show_submission', 'POST', _create_show),
+    ('delete_venue', 'DELETE', lambda ctx, i: (f"/venues/{ctx['created_venues'].pop()}", None)),
+    ('pool_metrics', 'GET', lambda ctx, i: ('/metrics/pool', None)),
+    ('query_metrics', 'GET', lambda ctx, i: ('/metrics/queries', None)),
+    ('template_metrics', 'GET', lambda ctx, i: ('/metrics/templates', None)),
+    ('api_venues', 'GET', lambda ctx, i: ('/api/v1/venues', None)),
+    ('api_venue', 'GET', lambda ctx, i: (f"/api/v1/venues/{_pick(ctx['venues'], i)[0]}", None)),
+    ('api_artists', 'GET', lambda ctx, i: ('/api/v1/artists', None)),
+    ('api_artist', 'GET', lambda ctx, i: (f"/api/v1/artists/{_pick(ctx['artists'], i)[0]}", None)),
+    ('api_shows', 'GET', lambda ctx, i: ('/api/v1/shows', None)),
+    ('api_genres', 'GET', lambda ctx, i: ('/api/v1/genres', None)),
+]
+
+#  Seeding
+#  ----------------------------------------------------------------
+
+def reset(db, venues, artists, shows):
+    """Recreate the schema and load a synthetic dataset; returns the run context."""
+    from sqlalchemy import text
+    from models import Venue, Artist
+    from synthetic import generate
+
+    with db.engine.begin() as conn:
+        conn.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+        conn.execute(text('CREATE EXTENSION IF NOT EXISTS btree_gist'))
+    db.drop_all()
+    db.create_all()
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    generate(venues, artists, shows, seed=0, now=now)
+    with db.engine.begin() as conn:
+        # Artists stay bookable for the shows the benchmark creates years ahead
+        conn.execute(text("""UPDATE "Availability" SET end_time = end_time + interval '10 years'"""))
+    return {
+        'now': now,
+        'venues': [tuple(row) for row in db.session.execute(db.select(Venue.id, Venue.name).order_by(Venue.id))],
+        'artists': [tuple(row) for row in db.session.execute(db.select(Artist.id, Artist.name).order_by(Artist.id))],
+    }
+
+#  Measuring
+#  ----------------------------------------------------------------
+
+def percentile(values, p):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, round(p / 100 * len(ordered)) - 1))]
+
+
+def measure(client, ctx, name, method, build, requests, warmup):
+    latencies, queries, errors = [], [], 0
+    peak_kib = 0
+    for i in range(warmup + requests):
+        path, data = build(ctx, i)
+        traced = i == 0
+        if traced:
+            tracemalloc.start()
+        start = time.perf_counter()
+        response = client.open(path, method=method, data=data)
+        response.get_data()
+        elapsed = time.perf_counter() - start
+        if traced:
+            peak_kib = tracemalloc.get_traced_memory()[1] / 1024
+            tracemalloc.stop()
+        errors += response.status_code >= 500
+        if i >= warmup:
+            latencies.append(elapsed * 1000)
+            queries.append(int(response.headers.get('X-Query-Count', 0)))
+    return {
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'max_ms': round(max(latencies), 3),
+        'queries': max(queries),
+        'peak_kib': round(peak_kib, 1),
+        'errors': errors,
+    }
+
+
+def run_scale(app, db, scale, requests, warmup):
+    from models import Venue
+
+    ctx = reset(db, *SCALES[scale])
+    client = app.test_client()
+    results = {}
+    for name, method, build in ROUTES:
+        if name == 'delete_venue':
+            ctx['created_venues'] = db.session.scalars(
+                db.select(Venue.id).where(Venue.name.like('bench created venue %'))
+            ).all()
+            db.session.remove()
+        results[name] = measure(client, ctx, name, method, build, requests, warmup)
+    return results
+
+#  Baseline
+#  ----------------------------------------------------------------
+
+def compare(results, baseline, tolerance):
+    """Regressions of ``results`` against ``baseline``, as messages."""
+    failures = []
+    for scale, routes in results.items():
+        for name, result in routes.items():
+            base = baseline.get(scale, {}).get(name)
+            if base is None:
+                continue
+            if result['queries'] > base['queries']:
+                failures.append(f"{scale} {name}: {result['queries']} queries, baseline {base['queries']}")
+            limit = max(base['p95_ms'] * (1 + tolerance), base['p95_ms'] + LATENCY_SLACK_MS)
+            if name in GATED and result['p95_ms'] > limit:
+                failures.append(f"{scale} {name}: p95 {result['p95_ms']:.2f} ms, baseline {base['p95_ms']:.2f} ms")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', default=os.environ.get('BENCHMARK_DATABASE_URL'),
+                        help='Scratch PostgreSQL database; defaults to $BENCHMARK_DATABASE_URL.')
+    parser.add_argument('--scale', nargs='+', choices=SCALES, default=['small'])
+    parser.add_argument('--requests', type=int, default=50, help='Timed requests per route.')
+    parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per route.')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed p95 growth of gated routes.')
+    parser.add_argument('--write-baseline', action='store_true')
+    parser.add_argument('--output', help='Also write the results to this JSON file.')
+    args = parser.parse_args(argv)
+
+    if not args.database_url:
+        sys.exit('routes needs --database-url or BENCHMARK_DATABASE_URL')
+    if args.database_url == os.environ.get('DATABASE_URL'):
+        sys.exit('refusing to drop the tables of the app database; use a separate benchmark database')
+    # The app reads its configuration at import time
+    os.environ['DATABASE_URL'] = args.database_url
+    os.environ['QUERY_PROFILER'] = '1'
+    from app import app
+    from models import db
+    if app.config['SQLALCHEMY_DATABASE_URI'] != args.database_url:
+        sys.exit('app was configured before the benchmark database could be selected')
+    app.config.update(WTF_CSRF_ENABLED=False, QUERY_PROFILER_PANEL=False)
+
+    results = {}
+    with app.app_context():
+        for scale in args.scale:
+            results[scale] = run_scale(app, db, scale, args.requests, args.warmup)
+
+    for scale, routes in results.items():
+        print(f'{scale} {SCALES[scale]}:')
+        print(f"  {'route':26} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'peak KiB':>9}")
+        for name, r in routes.items():
+            print(f"  {name:26} {r['p50_ms']:8.2f} {r['p95_ms']:8.2f} {r['p99_ms']:8.2f} "
+                  f"{r['queries']:8d} {r['peak_kib']:9.1f}" + (f"  {r['errors']} errors" if r['errors'] else ''))
+    print(f'max RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    failures = [f'{scale} {name}: {r["errors"]} server errors'
+                for scale, routes in results.items() for name, r in routes.items() if r['errors']]
+    if args.write_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f'baseline written to {args.baseline}')
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            failures += compare(results, json.load(f), args.tolerance)
+    else:
+        print(f'no baseline at {args.baseline}; run with --write-baseline to record one')
+    for failure in failures:
+        print('FAIL:', failure)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
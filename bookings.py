@@ -0,0 +1,57 @@
+from bisect import bisect_right, insort
+from collections import defaultdict
+
+from models import db, Show, SHOW_DURATION
+
+#----------------------------------------------------------------------------#
+# Double-booking checks.
+#----------------------------------------------------------------------------#
+# Every show lasts SHOW_DURATION, so two shows sharing a venue or an artist
+# overlap exactly when their start times are less than SHOW_DURATION apart.
+# The booking form asks the database first: one probe of each of the
+# (venue_id, start_time) and (artist_id, start_time) indexes. The exclusion
+# constraints on Show are what make it hold under concurrent submissions.
+# Bulk imports check thousands of rows against each other without a
+# round-trip each, using an in-memory BookingIndex.
+
+
+def conflicting_shows_query(venue_id, artist_id, start_time):
+    """Shows at the venue or with the artist overlapping a show at ``start_time``."""
+    return (
+        db.select(Show)
+        .where(
+            db.or_(Show.venue_id == venue_id, Show.artist_id == artist_id),
+            Show.start_time > start_time - SHOW_DURATION,
+            Show.start_time < start_time + SHOW_DURATION,
+        )
+        .order_by(Show.start_time)
+    )
+
+
+def find_conflict(venue_id, artist_id, start_time):
+    return db.session.scalars(conflicting_shows_query(venue_id, artist_id, start_time).limit(1)).first()
+
+
+class BookingIndex:
+    """Start times per key (a venue or artist id), kept sorted for bisection.
+
+    With a fixed duration an overlap test is one bisection: the first start
+    after ``start - SHOW_DURATION`` conflicts if it is before
+    ``start + SHOW_DURATION``.
+    """
+
+    def __init__(self, pairs=()):
+        self.starts = defaultdict(list)
+        for key, start in sorted(pairs, key=lambda pair: pair[1]):
+            self.starts[key].append(start)
+
+    def conflict(self, key, start):
+        """The start time of a booking overlapping ``start``, or None."""
+        starts = self.starts.get(key, ())
+        i = bisect_right(starts, start - SHOW_DURATION)
+        if i < len(starts) and starts[i] < start + SHOW_DURATION:
+            return starts[i]
+        return None
+
+    def add(self, key, start):
+        insort(self.starts[key], start)
@@ -0,0 +1,253 @@
+import pickle
+import threading
+from fnmatch import fnmatchcase
+from itertools import islice
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+#----------------------------------------------------------------------------#
+# Cache.
+#----------------------------------------------------------------------------#
+# Result cache for hot pages. Entries name the models they are built from and
+# are invalidated when a session commits a change to one of those models.
+# Invalidation works by versioning: every model (tag) has a version stamp that
+# is part of the key of each entry depending on it, and a commit replaces the
+# stamp. Because the stamps live in the cache backend, a shared backend makes
+# invalidation visible to every worker.
+
+class LRUCache:
+    """In-process LRU cache whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires = item
+            if expires is not None and expires <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Store ``value``; a ttl of 0 keeps it until it is evicted."""
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class LocalClient:
+    """Dict-backed stand-in for a Redis client (get/set/delete/scan_iter)."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            value, expires = self._data.get(name, (None, None))
+            if expires is not None and expires <= time.monotonic():
+                del self._data[name]
+                return None
+            return value
+
+    def set(self, name, value, ex=None):
+        with self._lock:
+            self._data[name] = (value, time.monotonic() + ex if ex else None)
+
+    def delete(self, *names):
+        with self._lock:
+            for name in names:
+                self._data.pop(name, None)
+
+    def scan_iter(self, match='*'):
+        with self._lock:
+            names = [name for name in self._data if fnmatchcase(name, match)]
+        return iter(names)
+
+
+class SharedCache:
+    """Cache stored in a shared key/value server through a Redis-style client."""
+
+    def __init__(self, client, ttl=300, prefix='fyyur:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key, default=None):
+        value = self.client.get(self.prefix + key)
+        return default if value is None else pickle.loads(value)
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=ttl or None)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        """Delete this cache's keys only; the server may hold other data."""
+        names = self.client.scan_iter(match=self.prefix + '*')
+        while batch := list(islice(names, 500)):
+            self.client.delete(*batch)
+
+
+def shared_client(url):
+    """A client for CACHE_SHARED_URL: ``local://`` or ``redis://host:port/db``."""
+    scheme = urlparse(url).scheme
+    if scheme == 'local':
+        return LocalClient()
+    if scheme in ('redis', 'rediss'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('CACHE_SHARED_URL uses Redis; pip install -r requirements-optional.txt.')
+        return redis.Redis.from_url(url)
+    raise ValueError(f'Unsupported CACHE_SHARED_URL scheme: {scheme!r}')
+
+
+def make_backend(config):
+    ttl = config.get('CACHE_DEFAULT_TTL', 300)
+    if config.get('CACHE_TYPE', 'lru') == 'shared':
+        return SharedCache(shared_client(config.get('CACHE_SHARED_URL', 'local://')), ttl=ttl)
+    return LRUCache(maxsize=config.get('CACHE_MAXSIZE', 1024), ttl=ttl)
+
+
+_MISSING = object()
+
+
+def _tag(model_or_table):
+    return getattr(model_or_table, '__tablename__', None) or str(model_or_table)
+
+
+class Cache:
+    """Flask extension holding the result cache and its model dependencies.
+
+    Each app has its own backend, kept in ``app.extensions['cache']``.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['cache'] = make_backend(app.config)
+        _listen()
+
+    @property
+    def backend(self):
+        """The backend of the current app; None, so nothing is cached, outside an app."""
+        return current_app.extensions.get('cache') if has_app_context() else None
+
+    def _version(self, backend, tag):
+        key = f'tag:{tag}'
+        version = backend.get(key)
+        if version is None:
+            # Never reuse a stamp, even if the old one was evicted.
+            version = time.time_ns()
+            backend.set(key, version, ttl=0)
+        return version
+
+    def get_or_set(self, name, builder, depends_on=(), ttl=None):
+        """The cached value of ``name``, calling ``builder()`` on a miss.
+
+        ``depends_on`` lists the models whose writes invalidate the entry.
+        """
+        backend = self.backend
+        if backend is None:
+            return builder()
+        key = self._key(backend, name, depends_on)
+        value = backend.get(key, _MISSING)
+        if value is _MISSING:
+            value = builder()
+            backend.set(key, value, ttl)
+        return value
+
+    async def get_or_set_async(self, name, builder, depends_on=(), ttl=None):
+        """``get_or_set`` for a coroutine function ``builder``."""
+        backend = self.backend
+        if backend is None:
+            return await builder()
+        key = self._key(backend, name, depends_on)
+        value = backend.get(key, _MISSING)
+        if value is _MISSING:
+            value = await builder()
+            backend.set(key, value, ttl)
+        return value
+
+    def _key(self, backend, name, depends_on):
+        versions = ':'.join(f'{tag}={self._version(backend, tag)}' for tag in sorted(map(_tag, depends_on)))
+        return f'{name}:{versions}'
+
+    def invalidate(self, *tags):
+        backend = self.backend
+        if backend is None:
+            return
+        for tag in map(_tag, tags):
+            backend.set(f'tag:{tag}', time.time_ns(), ttl=0)
+
+
+cache = Cache()
+
+#  Invalidation on commit
+#  ----------------------------------------------------------------
+# Tables written by a session are collected as it flushes (or runs ORM bulk
+# statements) and invalidated only once the transaction commits.
+
+def _pending_tags(session):
+    return session.info.setdefault('cache_tags', set())
+
+
+def _after_flush(session, flush_context):
+    tags = _pending_tags(session)
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        tags.add(_tag(type(instance)))
+
+
+def _do_orm_execute(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            _pending_tags(orm_execute_state.session).add(_tag(mapper.class_))
+
+
+def _after_commit(session):
+    tags = session.info.pop('cache_tags', None)
+    if tags:
+        cache.invalidate(*tags)
+
+
+def _after_rollback(session):
+    session.info.pop('cache_tags', None)
+
+
+def _listen():
+    if not event.contains(Session, 'after_commit', _after_commit):
+        event.listen(Session, 'after_flush', _after_flush)
+        event.listen(Session, 'do_orm_execute', _do_orm_execute)
+        event.listen(Session, 'after_commit', _after_commit)
+        event.listen(Session, 'after_rollback', _after_rollback)
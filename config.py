@@ -10,5 +10,65 @@ DEBUG = True
 
 
 # TODO IMPLEMENT DATABASE URL
-SQLALCHEMY_DATABASE_URI = 'postgresql://postgres@localhost:5432/fyyur'
-SQLALCHEMY_TRACK_MODIFICATIONS = False # Adding this line to suppress the warning and enhance the performance.
\ No newline at end of file
+SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'postgresql://postgres@localhost:5432/fyyur')
+SQLALCHEMY_TRACK_MODIFICATIONS = False # Adding this line to suppress the warning and enhance the performance.
+
+# Connection pool, per process: size it so workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+# stays below the server's max_connections. Pool metrics are served at /metrics/pool.
+SQLALCHEMY_ENGINE_OPTIONS = {
+    'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+    'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+    'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),  # seconds to wait for a connection
+    'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),  # seconds
+    'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', '1') == '1',
+}
+# Read replicas (replicas.py): comma-separated URLs in DATABASE_REPLICA_URLS. Read-only views
+# spread their SELECTs over the replicas lagging at most REPLICA_MAX_LAG seconds behind.
+SQLALCHEMY_REPLICA_URIS = [url for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url]
+REPLICA_MAX_LAG = float(os.environ.get('REPLICA_MAX_LAG', 5))  # seconds
+REPLICA_LAG_CHECK_INTERVAL = 1  # seconds between lag checks of each replica, per process
+DB_STATEMENT_TIMEOUT = int(os.environ.get('DB_STATEMENT_TIMEOUT', 30000))  # milliseconds, 0 disables; PostgreSQL
+
+# Keyset pagination of the /shows feed.
+SHOWS_PAGE_SIZE = 50
+SHOWS_MAX_PAGE_SIZE = 200
+
+# Search backend: 'trigram' (PostgreSQL pg_trgm), 'python', or 'auto' to pick by database.
+SEARCH_ENGINE = 'auto'
+SEARCH_RESULTS_LIMIT = 50
+
+# Result cache: 'lru' (per process) or 'shared' (CACHE_SHARED_URL, e.g. redis://localhost:6379/0,
+# or local:// for the in-process stand-in).
+CACHE_TYPE = os.environ.get('CACHE_TYPE', 'lru')
+CACHE_SHARED_URL = os.environ.get('CACHE_SHARED_URL', 'local://')
+CACHE_DEFAULT_TTL = 300
+CACHE_MAXSIZE = 1024
+
+# Per-request SQL profiling (profiler.py): statement counts, DB time and repeated
+# statements (likely N+1s) per request, as X-Query-* headers and an HTML panel.
+# QUERY_PROFILER_DUMP appends one JSON line per request to that file.
+QUERY_PROFILER = os.environ.get('QUERY_PROFILER', '1' if DEBUG else '0') == '1'
+QUERY_PROFILER_HEADERS = True
+QUERY_PROFILER_PANEL = DEBUG
+QUERY_PROFILER_DUMP = os.environ.get('QUERY_PROFILER_DUMP')
+QUERY_PROFILER_N_PLUS_ONE = 5  # same statement this many times in one request
+
+# Part of the ETag of venue/artist pages (http_cache.py): change it, e.g. per release,
+# when templates change so clients stop getting 304s for the old markup.
+HTTP_CACHE_VERSION = os.environ.get('RELEASE', '')
+
+# Templates (rendering.py): precompile all templates in startup.warm_up() into a bytecode cache shared by
+# workers (TEMPLATE_CACHE_DIR, default under the system temp dir) and stop rechecking their files.
+TEMPLATE_PRECOMPILE = os.environ.get('TEMPLATE_PRECOMPILE', '0' if DEBUG else '1') == '1'
+TEMPLATES_AUTO_RELOAD = not TEMPLATE_PRECOMPILE
+TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR')
+TEMPLATE_TIMING = os.environ.get('TEMPLATE_TIMING', '1' if DEBUG else '0') == '1'  # per-template render times at /metrics/templates
+
+# Clients allowed to read /metrics/*: comma-separated addresses or networks (e.g. 10.0.0.0/8). Behind a
+# proxy this is the proxy's address unless the app is wrapped in werkzeug's ProxyFix.
+METRICS_ALLOWED_IPS = os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+
+# Static assets (assets.py): `flask assets build` writes bundled, minified, content-hashed and
+# pre-compressed files to static/dist; pages link them when ASSETS_BUNDLED is set.
+ASSETS_BUNDLED = os.environ.get('ASSETS_BUNDLED', '0' if DEBUG else '1') == '1'
+ASSETS_MAX_AGE = 31536000  # seconds; a hashed file never changes
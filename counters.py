@@ -0,0 +1,142 @@
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import bindparam, update
+
+from models import db, Venue, Artist, Show, ShowCounterWatermark
+
+#----------------------------------------------------------------------------#
+# Show counters.
+#----------------------------------------------------------------------------#
+# Venue and Artist carry upcoming_shows_count and past_shows_count, so the
+# listing and search pages read counts from the rows they already load instead
+# of counting Show rows. The counters are exact as of a watermark W: a show is
+# upcoming when start_time > W and past otherwise.
+#
+# - Booking a show counts it on the side of W it falls (record_shows), in the
+#   transaction that inserts it.
+# - `flask counters rollover`, run periodically, moves the shows that started
+#   in (W, now] from upcoming to past and advances W to now. Between runs,
+#   upcoming counts include shows that started since the last one.
+# - `flask counters rebuild` recounts everything from Show.
+#
+# Bookings hold a share lock on the watermark row and the rollover an exclusive
+# one, so a show is never booked against a W that is moving under it.
+
+COUNTED = ((Venue, Show.venue_id), (Artist, Show.artist_id))
+
+counters_cli = AppGroup('counters', help='Maintain the denormalized venue/artist show counters.')
+
+
+def watermark(for_update=False):
+    """The watermark row, locked until the end of the transaction.
+
+    Shared lock by default; ``for_update`` takes it exclusively. A database
+    created without the migration gets a row at the current time.
+    """
+    query = db.select(ShowCounterWatermark).with_for_update(read=not for_update)
+    mark = db.session.scalars(query).first()
+    if mark is None:
+        mark = ShowCounterWatermark(id=1, rolled_over_at=datetime.now())
+        db.session.add(mark)
+        db.session.flush()
+    return mark
+
+
+def _add(model, deltas):
+    """Add (upcoming, past) deltas to the counters of the ``model`` rows they are keyed by."""
+    if not deltas:
+        return
+    table = model.__table__
+    statement = (
+        update(table)
+        .where(table.c.id == bindparam('row_id'))
+        .values(
+            upcoming_shows_count=table.c.upcoming_shows_count + bindparam('upcoming'),
+            past_shows_count=table.c.past_shows_count + bindparam('past'),
+        )
+    )
+    # In id order, so concurrent writers lock rows in the same order
+    db.session.execute(statement, [
+        {'row_id': row_id, 'upcoming': upcoming, 'past': past}
+        for row_id, (upcoming, past) in sorted(deltas.items())
+    ])
+
+
+def record_shows(shows):
+    """Count new shows, as (venue_id, artist_id, start_time), in their venue and artist.
+
+    Call in the transaction inserting them.
+    """
+    as_of = watermark().rolled_over_at
+    deltas = {Venue: defaultdict(lambda: [0, 0]), Artist: defaultdict(lambda: [0, 0])}
+    for venue_id, artist_id, start_time in shows:
+        side = 0 if start_time > as_of else 1
+        deltas[Venue][venue_id][side] += 1
+        deltas[Artist][artist_id][side] += 1
+    for model, model_deltas in deltas.items():
+        _add(model, model_deltas)
+
+
+def rollover_counts_query(key, since, until):
+    """Shows per ``key`` that started in (since, until]."""
+    return (
+        db.select(key, db.func.count(Show.id))
+        .where(Show.start_time > since, Show.start_time <= until)
+        .group_by(key)
+    )
+
+
+def rollover(now=None):
+    """Move the shows started since the watermark to past; returns how many moved."""
+    now = now or datetime.now()
+    mark = watermark(for_update=True)
+    if now <= mark.rolled_over_at:
+        db.session.rollback()
+        return 0
+    moved = 0
+    for model, key in COUNTED:
+        counts = db.session.execute(rollover_counts_query(key, mark.rolled_over_at, now)).all()
+        _add(model, {row_id: (-count, count) for row_id, count in counts})
+        moved = sum(count for _, count in counts)
+    mark.rolled_over_at = now
+    db.session.commit()
+    return moved
+
+
+def rebuild(now=None):
+    """Recount every venue and artist from Show as of ``now``."""
+    now = now or datetime.now()
+    mark = watermark(for_update=True)
+    for model, key in COUNTED:
+        def count(*criteria):
+            return db.select(db.func.count(Show.id)).where(key == model.id, *criteria).scalar_subquery()
+        db.session.execute(
+            update(model)
+            .values(upcoming_shows_count=count(Show.start_time > now),
+                    past_shows_count=count(Show.start_time <= now))
+            .execution_options(synchronize_session=False)
+        )
+    mark.rolled_over_at = now
+    db.session.commit()
+
+
+@counters_cli.command('rollover')
+@click.option('--every', type=int, help='Keep running, rolling over every this many seconds.')
+def rollover_command(every):
+    """Move shows that have started from upcoming to past counts."""
+    while True:
+        click.echo(f'{rollover()} shows moved to past.')
+        if not every:
+            break
+        time.sleep(every)
+
+
+@counters_cli.command('rebuild')
+def rebuild_command():
+    """Recount all venue and artist show counters from Show."""
+    rebuild()
+    click.echo('Show counters rebuilt.')
@@ -0,0 +1,141 @@
+import os
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+#----------------------------------------------------------------------------#
+# Connection pool.
+#----------------------------------------------------------------------------#
+# Engines for server databases use InstrumentedQueuePool, a QueuePool that
+# records how connections are handed out, so pool sizing can be tuned from
+# real traffic. Metrics are per process, i.e. per gunicorn worker, and carry
+# over when the pool is recreated by engine.dispose().
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.overflow_checkouts = 0
+        self.max_overflow_used = 0
+
+    def record_checkout(self, wait, overflow):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_time += wait
+            self.max_wait_time = max(self.max_wait_time, wait)
+            if overflow > 0:
+                self.overflow_checkouts += 1
+                self.max_overflow_used = max(self.max_overflow_used, overflow)
+
+    def increment(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def invalidated(self, dbapi_connection, connection_record, exception):
+        self.increment('invalidations')
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "errors": self.errors,
+                "wait_time_total": self.wait_time,
+                "wait_time_avg": self.wait_time / self.checkouts if self.checkouts else 0.0,
+                "wait_time_max": self.max_wait_time,
+                "overflow_checkouts": self.overflow_checkouts,
+                "overflow_max": self.max_overflow_used,
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records checkouts, wait time, overflow and invalidations."""
+
+    def __init__(self, creator, *args, **kwargs):
+        # recreate() passes the old pool's listeners along in _dispatch and
+        # hands its metrics over afterwards.
+        recreated = kwargs.get('_dispatch') is not None
+        super().__init__(creator, *args, **kwargs)
+        if not recreated:
+            self.metrics = PoolMetrics()
+            event.listen(self, 'invalidate', self.metrics.invalidated)
+            event.listen(self, 'soft_invalidate', self.metrics.invalidated)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.increment('timeouts')
+            raise
+        except Exception:
+            # e.g. the database refusing a new connection
+            self.metrics.increment('errors')
+            raise
+        self.metrics.record_checkout(time.perf_counter() - start, self.overflow())
+        return record
+
+    def _do_return_conn(self, record):
+        self.metrics.increment('checkins')
+        super()._do_return_conn(record)
+
+    def _create_connection(self):
+        self.metrics.increment('connects')
+        return super()._create_connection()
+
+
+def snapshot(engines):
+    """Metrics and current state of each instrumented pool in ``engines``."""
+    pools = {}
+    for bind_key, engine in engines.items():
+        pool = engine.pool
+        if isinstance(pool, InstrumentedQueuePool):
+            pools[bind_key or 'default'] = {
+                **pool.metrics.snapshot(),
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+            }
+    return {"pid": os.getpid(), "pools": pools}
+
+
+QUEUE_POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout')
+
+
+def init_app(app):
+    """Pick the pool class for the configured database. Call before ``db.init_app``.
+
+    Server databases get InstrumentedQueuePool. SQLite keeps SQLAlchemy's
+    default pool, which does not take the QueuePool sizing options.
+    PostgreSQL connections also get DB_STATEMENT_TIMEOUT.
+    """
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite':
+        for name in QUEUE_POOL_OPTIONS:
+            options.pop(name, None)
+    else:
+        options.setdefault('poolclass', InstrumentedQueuePool)
+    timeout = app.config.get('DB_STATEMENT_TIMEOUT')
+    if url.get_backend_name() == 'postgresql' and timeout is not None:
+        options.setdefault('connect_args', {'options': f'-c statement_timeout={timeout}'})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
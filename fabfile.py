@@ -5,9 +5,10 @@ from fabric.contrib.console import confirm
 
 
 def test():
+    # Route benchmarks against benchmarks/baseline.json; needs BENCHMARK_DATABASE_URL
     with settings(warn_only=True):
         result = local(
-            "python test_tasks.py -v && python test_users.py -v", capture=True
+            "python -m benchmarks.routes --scale small", capture=True
         )
     if result.failed and not confirm("Tests failed. Continue?"):
         abort("Aborted at user request.")
@@ -0,0 +1,57 @@
+from datetime import datetime, timezone
+from functools import lru_cache
+
+#----------------------------------------------------------------------------#
+# Date formatting.
+#----------------------------------------------------------------------------#
+# Queries hand templates native datetimes. Each (format, locale) pair is
+# parsed into a babel pattern once per process. A page formats each distinct
+# start time once, through format_datetimes()/label_show_times(), instead of
+# round-tripping str() -> dateutil -> babel in every show tile. babel and
+# dateutil are imported on first use, keeping them out of app startup.
+
+NAMED_FORMATS = {
+    'full': "EEEE MMMM, d, y 'at' h:mma",
+    'medium': "EE MM, dd, y h:mma",
+}
+DEFAULT_LOCALE = 'en'
+
+
+@lru_cache(maxsize=128)
+def datetime_pattern(format, locale):
+    """The compiled babel pattern and Locale for a named or literal format."""
+    import babel.dates
+    from babel import Locale
+    return babel.dates.parse_pattern(NAMED_FORMATS.get(format, format)), Locale.parse(locale)
+
+
+def _as_datetime(value):
+    if not isinstance(value, datetime):
+        import dateutil.parser
+        value = dateutil.parser.parse(value)  # strings from older callers
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)  # as babel.dates.format_datetime does
+    return value
+
+
+def format_datetime(value, format='medium', locale=DEFAULT_LOCALE):
+    pattern, locale = datetime_pattern(format, locale)
+    return pattern.apply(_as_datetime(value), locale)
+
+
+def format_datetimes(values, format='medium', locale=DEFAULT_LOCALE):
+    """Format a list of datetimes, each distinct value once."""
+    pattern, locale = datetime_pattern(format, locale)
+    labels = {}
+    for value in values:
+        if value not in labels:
+            labels[value] = pattern.apply(_as_datetime(value), locale)
+    return [labels[value] for value in values]
+
+
+def label_show_times(shows, format='full', locale=DEFAULT_LOCALE):
+    """Set ``start_time_label`` on each show dict; returns ``shows``."""
+    labels = format_datetimes([show['start_time'] for show in shows], format, locale)
+    for show, label in zip(shows, labels):
+        show['start_time_label'] = label
+    return shows
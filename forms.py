@@ -1,7 +1,23 @@
 from datetime import datetime
 from flask_wtf import FlaskForm
 from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, BooleanField
-from wtforms.validators import DataRequired, AnyOf, URL, Regexp, ValidationError, Optional
+from wtforms.validators import DataRequired, Optional, ValidationError
+import validation
+from validation import STATE_CHOICES, GENRE_CHOICES
+
+# Choices and rules come from validation.py, which the bulk importer uses too
+
+class Rule:
+    """WTForms validator running a rule of validation.py on the field's data."""
+
+    def __init__(self, rule):
+        self.rule = rule
+
+    def __call__(self, form, field):
+        try:
+            self.rule(field.data)
+        except validation.Invalid as e:
+            raise ValidationError(str(e))
 
 class ShowForm(FlaskForm):
     artist_id = StringField(
@@ -13,7 +29,7 @@ class ShowForm(FlaskForm):
     start_time = DateTimeField(
         'start_time',
         validators=[DataRequired()],
-        default= datetime.today()
+        default=datetime.today  # called per form, not once at import
     )
 
 class VenueForm(FlaskForm):
@@ -24,100 +40,28 @@ class VenueForm(FlaskForm):
         'city', validators=[DataRequired()]
     )
     state = SelectField(
-        'state', validators=[DataRequired()],
-        choices=[
-            ('AL', 'AL'),
-            ('AK', 'AK'),
-            ('AZ', 'AZ'),
-            ('AR', 'AR'),
-            ('CA', 'CA'),
-            ('CO', 'CO'),
-            ('CT', 'CT'),
-            ('DE', 'DE'),
-            ('DC', 'DC'),
-            ('FL', 'FL'),
-            ('GA', 'GA'),
-            ('HI', 'HI'),
-            ('ID', 'ID'),
-            ('IL', 'IL'),
-            ('IN', 'IN'),
-            ('IA', 'IA'),
-            ('KS', 'KS'),
-            ('KY', 'KY'),
-            ('LA', 'LA'),
-            ('ME', 'ME'),
-            ('MT', 'MT'),
-            ('NE', 'NE'),
-            ('NV', 'NV'),
-            ('NH', 'NH'),
-            ('NJ', 'NJ'),
-            ('NM', 'NM'),
-            ('NY', 'NY'),
-            ('NC', 'NC'),
-            ('ND', 'ND'),
-            ('OH', 'OH'),
-            ('OK', 'OK'),
-            ('OR', 'OR'),
-            ('MD', 'MD'),
-            ('MA', 'MA'),
-            ('MI', 'MI'),
-            ('MN', 'MN'),
-            ('MS', 'MS'),
-            ('MO', 'MO'),
-            ('PA', 'PA'),
-            ('RI', 'RI'),
-            ('SC', 'SC'),
-            ('SD', 'SD'),
-            ('TN', 'TN'),
-            ('TX', 'TX'),
-            ('UT', 'UT'),
-            ('VT', 'VT'),
-            ('VA', 'VA'),
-            ('WA', 'WA'),
-            ('WV', 'WV'),
-            ('WI', 'WI'),
-            ('WY', 'WY'),
-        ]
+        'state', validators=[DataRequired(), Rule(validation.state)],
+        choices=STATE_CHOICES, validate_choice=False
     )
     address = StringField(
         'address', validators=[DataRequired()]
     )
     phone = StringField(
-        'phone', validators=[DataRequired(), Regexp(r'^\d{3}-\d{3}-\d{4}$', message='Invalid phone number format')]
+        'phone', validators=[DataRequired(), Rule(validation.phone)]
     )
     image_link = StringField(
-        'image_link', validators=[Optional(), URL(message='Invalid URL')]
+        'image_link', validators=[Optional(), Rule(validation.url)]
     )
     genres = SelectMultipleField(
-        # TODO implement enum restriction
-        'genres', validators=[DataRequired()],
-        choices=[
-            ('Alternative', 'Alternative'),
-            ('Blues', 'Blues'),
-            ('Classical', 'Classical'),
-            ('Country', 'Country'),
-            ('Electronic', 'Electronic'),
-            ('Folk', 'Folk'),
-            ('Funk', 'Funk'),
-            ('Hip-Hop', 'Hip-Hop'),
-            ('Heavy Metal', 'Heavy Metal'),
-            ('Instrumental', 'Instrumental'),
-            ('Jazz', 'Jazz'),
-            ('Musical Theatre', 'Musical Theatre'),
-            ('Pop', 'Pop'),
-            ('Punk', 'Punk'),
-            ('R&B', 'R&B'),
-            ('Reggae', 'Reggae'),
-            ('Rock n Roll', 'Rock n Roll'),
-            ('Soul', 'Soul'),
-            ('Other', 'Other'),
-        ]
+        # TODO implement enum restriction - DONE
+        'genres', validators=[DataRequired(), Rule(validation.genres)],
+        choices=GENRE_CHOICES, validate_choice=False
     )
     facebook_link = StringField(
-        'facebook_link', validators=[Optional(), URL(message='Invalid URL')]
+        'facebook_link', validators=[Optional(), Rule(validation.url)]
     )
     website = StringField(
-        'website', validators=[Optional(), URL(message='Invalid URL')]
+        'website', validators=[Optional(), Rule(validation.url)]
     )
 
     seeking_talent = BooleanField( 'seeking_talent' )
@@ -136,98 +80,26 @@ class ArtistForm(FlaskForm):
         'city', validators=[DataRequired()]
     )
     state = SelectField(
-        'state', validators=[DataRequired()],
-        choices=[
-            ('AL', 'AL'),
-            ('AK', 'AK'),
-            ('AZ', 'AZ'),
-            ('AR', 'AR'),
-            ('CA', 'CA'),
-            ('CO', 'CO'),
-            ('CT', 'CT'),
-            ('DE', 'DE'),
-            ('DC', 'DC'),
-            ('FL', 'FL'),
-            ('GA', 'GA'),
-            ('HI', 'HI'),
-            ('ID', 'ID'),
-            ('IL', 'IL'),
-            ('IN', 'IN'),
-            ('IA', 'IA'),
-            ('KS', 'KS'),
-            ('KY', 'KY'),
-            ('LA', 'LA'),
-            ('ME', 'ME'),
-            ('MT', 'MT'),
-            ('NE', 'NE'),
-            ('NV', 'NV'),
-            ('NH', 'NH'),
-            ('NJ', 'NJ'),
-            ('NM', 'NM'),
-            ('NY', 'NY'),
-            ('NC', 'NC'),
-            ('ND', 'ND'),
-            ('OH', 'OH'),
-            ('OK', 'OK'),
-            ('OR', 'OR'),
-            ('MD', 'MD'),
-            ('MA', 'MA'),
-            ('MI', 'MI'),
-            ('MN', 'MN'),
-            ('MS', 'MS'),
-            ('MO', 'MO'),
-            ('PA', 'PA'),
-            ('RI', 'RI'),
-            ('SC', 'SC'),
-            ('SD', 'SD'),
-            ('TN', 'TN'),
-            ('TX', 'TX'),
-            ('UT', 'UT'),
-            ('VT', 'VT'),
-            ('VA', 'VA'),
-            ('WA', 'WA'),
-            ('WV', 'WV'),
-            ('WI', 'WI'),
-            ('WY', 'WY'),
-        ]
+        'state', validators=[DataRequired(), Rule(validation.state)],
+        choices=STATE_CHOICES, validate_choice=False
     )
     phone = StringField(
-        'phone', validators=[DataRequired(), Regexp(r'^\d{3}-\d{3}-\d{4}$', message='Invalid phone number format')]
+        'phone', validators=[DataRequired(), Rule(validation.phone)]
     )
     image_link = StringField(
-        'image_link', validators=[Optional(), URL(message='Invalid URL')]
+        'image_link', validators=[Optional(), Rule(validation.url)]
     )
     genres = SelectMultipleField(
-        'genres', validators=[DataRequired()],
-        choices=[
-            ('Alternative', 'Alternative'),
-            ('Blues', 'Blues'),
-            ('Classical', 'Classical'),
-            ('Country', 'Country'),
-            ('Electronic', 'Electronic'),
-            ('Folk', 'Folk'),
-            ('Funk', 'Funk'),
-            ('Hip-Hop', 'Hip-Hop'),
-            ('Heavy Metal', 'Heavy Metal'),
-            ('Instrumental', 'Instrumental'),
-            ('Jazz', 'Jazz'),
-            ('Musical Theatre', 'Musical Theatre'),
-            ('Pop', 'Pop'),
-            ('Punk', 'Punk'),
-            ('R&B', 'R&B'),
-            ('Reggae', 'Reggae'),
-            ('Rock n Roll', 'Rock n Roll'),
-            ('Soul', 'Soul'),
-            ('Other', 'Other'),
-        ]
+        'genres', validators=[DataRequired(), Rule(validation.genres)],
+        choices=GENRE_CHOICES, validate_choice=False
      )
     facebook_link = StringField(
         # TODO implement enum restriction - DONE
-        'facebook_link', validators=[Optional(), URL(message='Invalid URL')]
+        'facebook_link', validators=[Optional(), Rule(validation.url)]
      )
 
     website = StringField(
-        'website', validators=[Optional(), URL(message='Invalid URL')]
+        'website', validators=[Optional(), Rule(validation.url)]
      )
 
     seeking_venue = BooleanField( 'seeking_venue' )
@@ -236,19 +108,8 @@ class ArtistForm(FlaskForm):
             'seeking_description'
      )
 
-    def validate_available_times(form, field):
-        """
-        Custom validator for available_times field.
-        Checks if each time string is in the correct format (YYYY-MM-DD HH:MM:SS).
-        """
-        for time_str in field.data.split(","):
-            time_str = time_str.strip()
-            try:
-                datetime.strptime(time_str, '%Y-%m-%d %H:%M:%S')
-            except ValueError:
-                raise ValidationError('Invalid time format. Please use YYYY-MM-DD HH:MM:SS')
-
     available_times = StringField(
         'available_times',
-        validators=[DataRequired(), validate_available_times]  # Apply the custom validator
-    )
\ No newline at end of file
+        # Each comma-separated entry is a start time (YYYY-MM-DD HH:MM:SS) or a start/end range
+        validators=[DataRequired(), Rule(validation.available_times)]
+    )
@@ -0,0 +1,93 @@
+from datetime import datetime, timezone
+
+from flask import current_app, make_response, request, session
+from sqlalchemy import update
+
+from models import db, Venue, Artist, Show
+
+#----------------------------------------------------------------------------#
+# HTTP caching of detail pages.
+#----------------------------------------------------------------------------#
+# Venue and artist pages are versioned by the updated_at column of their row.
+# The column is bumped when the row is edited, and when its show counters
+# change, which covers new shows and the counter rollover. Editing a venue or
+# artist also bumps the pages on the other side of its shows, because those
+# pages show its name and image.
+#
+# The pages split shows into past and upcoming at the time of the request, so
+# the start of the latest show that has begun versions them too: once the
+# next upcoming show starts, the version moves on to its start time.
+#
+# The routes look up updated_at and that start time, by primary key and one
+# probe of the (venue_id/artist_id, start_time) index, before running any
+# other query. If the client's ETag or Last-Modified is current, they answer
+# 304 Not Modified. Responses are sent with "no-cache", so browsers always
+# revalidate. Pages with pending flash messages are always rendered in full.
+
+
+def version_query(model, entity_id, now=None):
+    """(updated_at, start of the latest show begun by ``now``) of an entity."""
+    key = Show.venue_id if model is Venue else Show.artist_id
+    last_started = (
+        db.select(db.func.max(Show.start_time))
+        .where(key == entity_id, Show.start_time <= (now or datetime.now()))
+        .scalar_subquery()
+    )
+    return db.select(model.updated_at, last_started).where(model.id == entity_id)
+
+
+def page_validators(model, entity_id, version):
+    """(etag, last_modified) of a page from a row of version_query, or None if there is no such entity."""
+    if version is None:
+        return None
+    updated_at, last_started = version
+    modified_at = max(updated_at, last_started) if last_started is not None else updated_at
+    release = current_app.config.get('HTTP_CACHE_VERSION', '')
+    etag = f'{model.__tablename__.lower()}-{entity_id}-{modified_at.timestamp():.6f}-{release}'
+    # Both times are naive local time; HTTP dates are UTC
+    return etag, modified_at.astimezone(timezone.utc)
+
+
+def validators(model, entity_id):
+    """(etag, last_modified) of an entity's page, or None if there is no such entity."""
+    return page_validators(model, entity_id, db.session.execute(version_query(model, entity_id)).first())
+
+
+def is_fresh(page_validators):
+    """Whether the client's copy of the page is current and may get a 304."""
+    if page_validators is None or session.get('_flashes'):
+        return False
+    etag, last_modified = page_validators
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def with_validators(response, page_validators):
+    """Attach ETag, Last-Modified and revalidation headers to a page response."""
+    response = make_response(response)
+    if page_validators is not None and response.status_code in (200, 304):
+        etag, last_modified = page_validators
+        response.set_etag(etag, weak=True)
+        response.last_modified = last_modified
+        response.cache_control.no_cache = True
+    return response
+
+
+def not_modified(page_validators):
+    return with_validators(('', 304), page_validators)
+
+
+def touch_counterparts(model, entity_id):
+    """Bump the pages that list shows of this venue or artist; does not commit."""
+    key, other, other_key = (
+        (Show.venue_id, Artist, Show.artist_id) if model is Venue else (Show.artist_id, Venue, Show.venue_id)
+    )
+    db.session.execute(
+        update(other)
+        .where(other.id.in_(db.select(other_key).where(key == entity_id)))
+        .values(updated_at=datetime.now())
+        .execution_options(synchronize_session=False)
+    )
@@ -0,0 +1,225 @@
+import csv
+import io
+import json
+import time
+from itertools import islice
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import insert
+
+from cache import cache
+from availability import AvailabilityIndex
+from bookings import BookingIndex
+from counters import record_shows
+from models import db, Venue, Artist, Show, Availability
+from validation import Invalid, VENUE, ARTIST, SHOW
+
+#----------------------------------------------------------------------------#
+# Bulk import.
+#----------------------------------------------------------------------------#
+# `flask import venues|artists|shows FILE` loads CSV or NDJSON files in
+# batches. Rows are checked against the schemas of validation.py, which hold
+# the rules of the web forms without building a form per row, and written
+# with COPY on PostgreSQL or one executemany INSERT per batch elsewhere.
+# Artists are inserted with RETURNING so their availability slots can follow
+# in the same batch. Shows outside the artist's availability, or that would
+# double-book a venue or artist, are rejected before they reach the database.
+
+import_cli = AppGroup('import', help='Bulk-load venues, artists and shows from CSV or NDJSON files.')
+
+
+def read_records(path):
+    """Yield (line number, record) from a .csv file or an NDJSON file."""
+    with open(path, newline='') as f:
+        if path.endswith('.csv'):
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+        else:
+            for line_no, line in enumerate(f, 1):
+                if line.strip():
+                    yield line_no, json.loads(line)
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+#  Writers
+#  ----------------------------------------------------------------
+
+def _copy_value(value):
+    if isinstance(value, list):
+        items = (str(item).replace('\\', '\\\\').replace('"', '\\"') for item in value)
+        return '{' + ','.join(f'"{item}"' for item in items) + '}'
+    return value
+
+
+def copy_rows(model, rows):
+    """Load ``rows`` into ``model``'s table with PostgreSQL COPY."""
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    # Non-numeric values are quoted, and so is None, written as "". COPY reads a
+    # quoted "" as an empty string, so FORCE_NULL turns it back into NULL in the
+    # nullable columns; the schemas never pass empty strings on.
+    writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+    for row in rows:
+        writer.writerow([_copy_value(row[column]) for column in columns])
+    buffer.seek(0)
+    column_list = ', '.join(f'"{column}"' for column in columns)
+    nullable = ', '.join(f'"{column}"' for column in columns if model.__table__.c[column].nullable)
+    options = f'FORMAT csv, FORCE_NULL ({nullable})' if nullable else 'FORMAT csv'
+    cursor = db.session.connection().connection.cursor()
+    cursor.copy_expert(f'COPY "{model.__tablename__}" ({column_list}) FROM STDIN WITH ({options})', buffer)
+
+
+def insert_rows(model, rows):
+    """Insert ``rows`` with a single executemany INSERT."""
+    db.session.execute(insert(model), rows)
+
+
+def write_rows(model, rows):
+    if not rows:
+        return
+    if db.engine.dialect.name == 'postgresql':
+        copy_rows(model, rows)
+    else:
+        insert_rows(model, rows)
+
+
+def write_artists(model, rows):
+    """Insert artists, then their availability slots keyed by the new ids."""
+    slots = [row.pop('availability') for row in rows]
+    ids = db.session.scalars(insert(model).returning(model.id, sort_by_parameter_order=True), rows).all()
+    write_rows(Availability, [
+        {'artist_id': artist_id, 'start_time': start, 'end_time': end}
+        for artist_id, artist_slots in zip(ids, slots)
+        for start, end in artist_slots
+    ])
+
+def write_shows(model, rows):
+    """Insert shows and count them in their venues' and artists' counters."""
+    write_rows(model, rows)
+    record_shows((row['venue_id'], row['artist_id'], row['start_time']) for row in rows)
+
+#  Row shaping
+#  ----------------------------------------------------------------
+
+def venue_row(data):
+    return {column: data.get(column) for column in (
+        'name', 'city', 'state', 'address', 'phone', 'genres', 'image_link',
+        'facebook_link', 'website', 'seeking_talent', 'seeking_description'
+    )}
+
+
+def artist_row(data):
+    row = {column: data.get(column) for column in (
+        'name', 'city', 'state', 'phone', 'genres', 'image_link',
+        'facebook_link', 'website', 'seeking_venue', 'seeking_description'
+    )}
+    row['availability'] = data['available_times']  # parsed into slots by the schema
+    return row
+
+
+class ShowRows:
+    """Shapes show rows, rejecting unknown ids, unavailable artists and double bookings.
+
+    Availability is checked in memory against the stored slots, overlaps
+    against the shows already stored and the rows accepted earlier in the file.
+    """
+
+    def __init__(self):
+        self.venue_ids = set(db.session.scalars(db.select(Venue.id)))
+        self.artist_ids = set(db.session.scalars(db.select(Artist.id)))
+        self.availability = AvailabilityIndex.load()
+        shows = db.session.execute(db.select(Show.venue_id, Show.artist_id, Show.start_time)).all()
+        self.venue_bookings = BookingIndex((show.venue_id, show.start_time) for show in shows)
+        self.artist_bookings = BookingIndex((show.artist_id, show.start_time) for show in shows)
+
+    def __call__(self, data):
+        try:
+            venue_id, artist_id = int(data['venue_id']), int(data['artist_id'])
+        except (TypeError, ValueError):  # e.g. a list in an NDJSON row
+            raise Invalid('venue_id and artist_id must be integers.')
+        if venue_id not in self.venue_ids:
+            raise Invalid(f'Venue {venue_id} does not exist.')
+        if artist_id not in self.artist_ids:
+            raise Invalid(f'Artist {artist_id} does not exist.')
+        start_time = data['start_time']
+        if not self.availability.covers(artist_id, start_time):
+            raise Invalid(f'Artist {artist_id} is not available at {start_time}.')
+        for name, key, bookings in (('Venue', venue_id, self.venue_bookings),
+                                    ('Artist', artist_id, self.artist_bookings)):
+            conflict = bookings.conflict(key, start_time)
+            if conflict is not None:
+                raise Invalid(f'{name} {key} is already booked for a show at {conflict}.')
+        self.venue_bookings.add(venue_id, start_time)
+        self.artist_bookings.add(artist_id, start_time)
+        return {'venue_id': venue_id, 'artist_id': artist_id, 'start_time': start_time}
+
+#  Pipeline
+#  ----------------------------------------------------------------
+
+def import_file(model, schema, shape, path, batch_size, write=write_rows, max_errors=20):
+    """Validate and load ``path``; returns (loaded, rejected, seconds)."""
+    loaded = rejected = 0
+    start = time.perf_counter()
+
+    def rows():
+        nonlocal rejected
+        for line_no, record in read_records(path):
+            data, errors = schema.validate(record)
+            if not errors:
+                try:
+                    yield shape(data)
+                    continue
+                except Invalid as e:
+                    errors = {'row': str(e)}
+            rejected += 1
+            if rejected <= max_errors:
+                click.echo(f'Rejected line {line_no}: {errors}', err=True)
+
+    for batch in batched(rows(), batch_size):
+        write(model, batch)
+        db.session.commit()
+        loaded += len(batch)
+        elapsed = time.perf_counter() - start
+        click.echo(f'{loaded} rows loaded ({loaded / elapsed:,.0f} rows/s)')
+    cache.invalidate(model)
+    return loaded, rejected, time.perf_counter() - start
+
+
+def _run(model, schema, shape, path, batch_size, write=write_rows):
+    loaded, rejected, seconds = import_file(model, schema, shape, path, batch_size, write)
+    rate = loaded / seconds if seconds else 0
+    click.echo(f'Imported {loaded} {model.__tablename__} rows, rejected {rejected}, '
+               f'in {seconds:.1f}s ({rate:,.0f} rows/s).')
+
+batch_option = click.option('--batch-size', default=5000, show_default=True, help='Rows per COPY/INSERT.')
+path_argument = click.argument('path', type=click.Path(exists=True, dir_okay=False))
+
+
+@import_cli.command('venues')
+@path_argument
+@batch_option
+def import_venues(path, batch_size):
+    """Import venues from a CSV or NDJSON file."""
+    _run(Venue, VENUE, venue_row, path, batch_size)
+
+
+@import_cli.command('artists')
+@path_argument
+@batch_option
+def import_artists(path, batch_size):
+    """Import artists from a CSV or NDJSON file."""
+    _run(Artist, ARTIST, artist_row, path, batch_size, write_artists)
+
+
+@import_cli.command('shows')
+@path_argument
+@batch_option
+def import_shows(path, batch_size):
+    """Import shows from a CSV or NDJSON file."""
+    _run(Show, SHOW, ShowRows(), path, batch_size, write_shows)
@@ -5,7 +5,7 @@ from flask import current_app
 
 from alembic import context
 
-from app import db
+from models import db
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -48,7 +48,7 @@ target_db = current_app.extensions['migrate'].db
 
 
 def get_metadata():
-    from app import db  # Import fyyur db object from app.py
+    from models import db  # Import fyyur db object from models.py
     return db.metadata 
 
 def run_migrations_offline():
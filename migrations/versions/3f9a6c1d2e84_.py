@@ -0,0 +1,37 @@
+"""add pg_trgm search indexes
+
+Revision ID: 3f9a6c1d2e84
+Revises: c27c75686c78
+Create Date: 2026-10-18 10:12:41.518302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a6c1d2e84'
+down_revision = 'c27c75686c78'
+branch_labels = None
+depends_on = None
+
+SEARCH_COLUMNS = {
+    'Venue': ('name', 'city', 'state'),
+    'Artist': ('name', 'city', 'state'),
+}
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table, columns in SEARCH_COLUMNS.items():
+        for column in columns:
+            op.create_index(
+                f'ix_{table}_{column}_trgm', table, [column], unique=False,
+                postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'}
+            )
+
+
+def downgrade():
+    for table, columns in SEARCH_COLUMNS.items():
+        for column in columns:
+            op.drop_index(f'ix_{table}_{column}_trgm', table_name=table)
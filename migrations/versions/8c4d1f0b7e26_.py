@@ -0,0 +1,72 @@
+"""move artist availability to indexed Availability ranges
+
+Revision ID: 8c4d1f0b7e26
+Revises: 5b2e8d7a9c13
+Create Date: 2026-10-18 12:20:45.130877
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4d1f0b7e26'
+down_revision = '5b2e8d7a9c13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('Availability',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('artist_id', sa.Integer(), nullable=False),
+    sa.Column('start_time', sa.DateTime(), nullable=False),
+    sa.Column('end_time', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['artist_id'], ['Artist.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('Availability', schema=None) as batch_op:
+        batch_op.create_index('ix_Availability_artist_id_start_time', ['artist_id', 'start_time'], unique=False)
+    op.create_index('ix_Availability_period', 'Availability',
+                    [sa.text('tsrange(start_time, end_time)')], unique=False, postgresql_using='gist')
+
+    # Each listed time becomes a one hour slot (availability.SLOT_LENGTH);
+    # overlapping or touching slots of an artist are merged into one range.
+    op.execute("""
+        WITH slots AS (
+            SELECT DISTINCT a.id AS artist_id, t::timestamp AS s, t::timestamp + interval '1 hour' AS e
+            FROM "Artist" a, unnest(a.available_times) AS t
+        ), marked AS (
+            SELECT *, CASE WHEN s <= max(e) OVER (
+                PARTITION BY artist_id ORDER BY s, e ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+            ) THEN 0 ELSE 1 END AS starts_range
+            FROM slots
+        ), ranges AS (
+            SELECT *, sum(starts_range) OVER (PARTITION BY artist_id ORDER BY s, e) AS range_no
+            FROM marked
+        )
+        INSERT INTO "Availability" (artist_id, start_time, end_time)
+        SELECT artist_id, min(s), max(e) FROM ranges GROUP BY artist_id, range_no
+    """)
+
+    with op.batch_alter_table('Artist', schema=None) as batch_op:
+        batch_op.drop_column('available_times')
+
+
+def downgrade():
+    with op.batch_alter_table('Artist', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('available_times', sa.ARRAY(sa.String()), autoincrement=False, nullable=True))
+
+    # Ranges come back as their start times.
+    op.execute("""
+        UPDATE "Artist" a SET available_times = (
+            SELECT array_agg(to_char(v.start_time, 'YYYY-MM-DD HH24:MI:SS') ORDER BY v.start_time)
+            FROM "Availability" v WHERE v.artist_id = a.id
+        )
+    """)
+
+    op.drop_index('ix_Availability_period', table_name='Availability', postgresql_using='gist')
+    with op.batch_alter_table('Availability', schema=None) as batch_op:
+        batch_op.drop_index('ix_Availability_artist_id_start_time')
+
+    op.drop_table('Availability')
@@ -0,0 +1,26 @@
+"""add GIN indexes on Venue/Artist genres
+
+Revision ID: 9e1b4c7a2d58
+Revises: f4a1d7c29e35
+Create Date: 2026-10-18 16:40:12.604417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e1b4c7a2d58'
+down_revision = 'f4a1d7c29e35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('Venue', 'Artist'):
+        op.create_index(f'ix_{table}_genres', table, ['genres'], unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    for table in ('Artist', 'Venue'):
+        op.drop_index(f'ix_{table}_genres', table_name=table)
@@ -0,0 +1,37 @@
+"""add Show exclusion constraints against double booking
+
+Revision ID: d2f6a9b1c473
+Revises: 8c4d1f0b7e26
+Create Date: 2026-10-18 13:05:12.662019
+
+Fails if the table already holds overlapping shows; list them with
+    SELECT a.id, b.id FROM "Show" a JOIN "Show" b ON a.id < b.id
+     AND (a.venue_id = b.venue_id OR a.artist_id = b.artist_id)
+     AND abs(extract(epoch FROM a.start_time - b.start_time)) < 7200;
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f6a9b1c473'
+down_revision = '8c4d1f0b7e26'
+branch_labels = None
+depends_on = None
+
+# models.SHOW_DURATION
+SHOW_PERIOD = "tsrange(start_time, start_time + interval '7200 seconds')"
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    for column in ('venue_id', 'artist_id'):
+        op.execute(
+            f'ALTER TABLE "Show" ADD CONSTRAINT "ex_Show_{column}_period" '
+            f'EXCLUDE USING gist ({column} WITH =, {SHOW_PERIOD} WITH &&)'
+        )
+
+
+def downgrade():
+    for column in ('artist_id', 'venue_id'):
+        op.drop_constraint(f'ex_Show_{column}_period', 'Show')
@@ -0,0 +1,48 @@
+"""add denormalized venue/artist show counters
+
+Revision ID: e8b3c5d07a12
+Revises: d2f6a9b1c473
+Create Date: 2026-10-18 14:31:08.215774
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b3c5d07a12'
+down_revision = 'd2f6a9b1c473'
+branch_labels = None
+depends_on = None
+
+COUNTED = {'Venue': 'venue_id', 'Artist': 'artist_id'}
+
+
+def upgrade():
+    for table in COUNTED:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+            batch_op.add_column(sa.Column('past_shows_count', sa.Integer(), server_default='0', nullable=False))
+    op.create_table('ShowCounterWatermark',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('rolled_over_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Count the existing shows as of now, and start the watermark there
+    op.execute('INSERT INTO "ShowCounterWatermark" (id, rolled_over_at) VALUES (1, LOCALTIMESTAMP)')
+    for table, key in COUNTED.items():
+        op.execute(f'''
+            UPDATE "{table}" SET
+                upcoming_shows_count = (SELECT count(*) FROM "Show" s WHERE s.{key} = "{table}".id
+                                        AND s.start_time > (SELECT rolled_over_at FROM "ShowCounterWatermark")),
+                past_shows_count = (SELECT count(*) FROM "Show" s WHERE s.{key} = "{table}".id
+                                    AND s.start_time <= (SELECT rolled_over_at FROM "ShowCounterWatermark"))
+        ''')
+
+
+def downgrade():
+    op.drop_table('ShowCounterWatermark')
+    for table in reversed(list(COUNTED)):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('past_shows_count')
+            batch_op.drop_column('upcoming_shows_count')
@@ -0,0 +1,28 @@
+"""add Venue/Artist updated_at for HTTP caching
+
+Revision ID: f4a1d7c29e35
+Revises: e8b3c5d07a12
+Create Date: 2026-10-18 15:12:40.381922
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4a1d7c29e35'
+down_revision = 'e8b3c5d07a12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('Venue', 'Artist'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False))
+
+
+def downgrade():
+    for table in ('Artist', 'Venue'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('updated_at')
@@ -1,13 +1,39 @@
+from datetime import datetime, timedelta
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects.postgresql import ARRAY, ExcludeConstraint
+
+from replicas import RoutingSession
 
-db = SQLAlchemy()  # Initialize SQLAlchemy
+db = SQLAlchemy(session_options={'class_': RoutingSession})  # Reads of @read_only views may go to a replica
 
 #----------------------------------------------------------------------------#
 # Models.
 #----------------------------------------------------------------------------#
 # Moved to models.py for Separation of Concers.
+
+def trigram_index(table, column):
+    """GIN trigram index serving ILIKE '%term%' searches on PostgreSQL (needs pg_trgm)."""
+    return db.Index(
+        f'ix_{table}_{column}_trgm', column,
+        postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'}
+    )
+
+# Genre lists are PostgreSQL arrays, stored as JSON on SQLite so the schema builds there too
+GENRE_LIST = ARRAY(db.String).with_variant(db.JSON, 'sqlite')
+
+def genre_index(table):
+    """GIN index serving genre filters (genres @> ARRAY[...]) on PostgreSQL."""
+    return db.Index(f'ix_{table}_genres', 'genres', postgresql_using='gin')
+
 class Venue(db.Model):
     __tablename__ = 'Venue'
+    __table_args__ = (
+        trigram_index('Venue', 'name'),
+        trigram_index('Venue', 'city'),
+        trigram_index('Venue', 'state'),
+        genre_index('Venue'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, nullable=False, unique=True)
@@ -15,7 +41,7 @@ class Venue(db.Model):
     state = db.Column(db.String(120), nullable=False)  # State is required
     address = db.Column(db.String(120), nullable=False)  # Address is required
     phone = db.Column(db.String(120), nullable=False)  # Phone is required
-    genres = db.Column(db.ARRAY(db.String), nullable=False)   # Genres is required
+    genres = db.Column(GENRE_LIST, nullable=False)   # Genres is required
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
 
@@ -23,18 +49,30 @@ class Venue(db.Model):
     website = db.Column(db.String(120))
     seeking_talent = db.Column(db.Boolean, default=False)  # Add seeking_venue field
     seeking_description = db.Column(db.String(500))  # Add seeking_description field 
+    # Show counts as of the counter watermark, maintained by counters.py
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Version of the detail page, for ETag/Last-Modified (see http_cache.py)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now,
+                           server_default=db.func.now())
     # Relationships
     shows = db.relationship('Show', backref='venue', lazy=True)  # Define relationship to Show model
 
 class Artist(db.Model):
     __tablename__ = 'Artist'
+    __table_args__ = (
+        trigram_index('Artist', 'name'),
+        trigram_index('Artist', 'city'),
+        trigram_index('Artist', 'state'),
+        genre_index('Artist'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, nullable=False, unique=True)  # Name is required and unique
     city = db.Column(db.String(120), nullable=False)  # City is required
     state = db.Column(db.String(120), nullable=False)  # State is required
     phone = db.Column(db.String(120), nullable=False)  # Phone is required
-    genres = db.Column(db.ARRAY(db.String), nullable=False)  # Genres is required
+    genres = db.Column(GENRE_LIST, nullable=False)  # Genres is required
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
 
@@ -43,18 +81,82 @@ class Artist(db.Model):
     # Add website field
     seeking_venue = db.Column(db.Boolean, default=False)  # Add seeking_venue field
     seeking_description = db.Column(db.String(500))  # Add seeking_description field
-    # Attempting BONUS task of having artist availability
-    available_times = db.Column(db.ARRAY(db.String))  # Add available_times field
+    # Show counts as of the counter watermark, maintained by counters.py
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Version of the detail page, for ETag/Last-Modified (see http_cache.py)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now,
+                           server_default=db.func.now())
     # Relationships
     shows = db.relationship('Show', backref='artist', lazy=True)  # Define relationship to Show model
+    availability = db.relationship('Availability', backref='artist', lazy=True,
+                                   cascade='all, delete-orphan', order_by='Availability.start_time')
+
+
+# Attempting BONUS task of having artist availability: see availability.py
+class Availability(db.Model):
+    __tablename__ = 'Availability'
+    __table_args__ = (
+        db.Index('ix_Availability_artist_id_start_time', 'artist_id', 'start_time'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id', ondelete='CASCADE'), nullable=False)
+    start_time = db.Column(db.DateTime, nullable=False)
+    end_time = db.Column(db.DateTime, nullable=False)
+    def __repr__(self):
+        return f'<Availability {self.artist_id} {self.start_time} {self.end_time}>'
+
+# "Which artists are free in this window" searches by range containment.
+db.Index(
+    'ix_Availability_period',
+    db.func.tsrange(Availability.start_time, Availability.end_time),
+    postgresql_using='gist'
+).ddl_if(dialect='postgresql')
 
 
 # TODO Implement Show and Artist models, and complete all model relationships and properties, as a database migration. - DONE
 class Show(db.Model):
     __tablename__ = 'Show'
+    __table_args__ = (
+        # Detail pages and upcoming counts filter by one side and a start_time range
+        db.Index('ix_Show_venue_id_start_time', 'venue_id', 'start_time'),
+        db.Index('ix_Show_artist_id_start_time', 'artist_id', 'start_time'),
+        # The /shows feed orders and pages by (start_time, id)
+        db.Index('ix_Show_start_time_id', 'start_time', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id'), nullable=False)
     venue_id = db.Column(db.Integer, db.ForeignKey('Venue.id'), nullable=False)
     start_time = db.Column(db.DateTime, nullable=False)
     def __repr__(self):
-        return f'<Show {self.id} {self.artist_id} {self.venue_id}>' 
\ No newline at end of file
+        return f'<Show {self.id} {self.artist_id} {self.venue_id}>'
+
+    @property
+    def end_time(self):
+        return self.start_time + SHOW_DURATION
+
+
+# A show occupies its venue and artist for SHOW_DURATION from start_time. On
+# PostgreSQL two exclusion constraints (GiST, needs btree_gist) reject any
+# second show overlapping that period at the same venue or with the same artist,
+# which holds for concurrent submissions too; see bookings.py.
+SHOW_DURATION = timedelta(hours=2)
+
+def show_period():
+    duration = db.literal_column(f"interval '{int(SHOW_DURATION.total_seconds())} seconds'")
+    return db.func.tsrange(Show.start_time, Show.start_time + duration)
+
+for column in (Show.venue_id, Show.artist_id):
+    Show.__table__.append_constraint(ExcludeConstraint(
+        (column, '='), (show_period(), '&&'),
+        name=f'ex_Show_{column.key}_period', using='gist'
+    ).ddl_if(dialect='postgresql')) 
+
+
+# Single row: the time up to which shows have been counted as past.
+class ShowCounterWatermark(db.Model):
+    __tablename__ = 'ShowCounterWatermark'
+    id = db.Column(db.Integer, primary_key=True)
+    rolled_over_at = db.Column(db.DateTime, nullable=False)
+    def __repr__(self):
+        return f'<ShowCounterWatermark {self.rolled_over_at}>'
@@ -0,0 +1,220 @@
+import json
+import re
+import threading
+import time
+from collections import defaultdict
+
+from flask import current_app, g, has_request_context, render_template, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+#----------------------------------------------------------------------------#
+# Query profiler.
+#----------------------------------------------------------------------------#
+# Counts the SQL statements each request issues and the time spent in them,
+# grouped by fingerprint (the statement with literals and IN lists collapsed).
+# A fingerprint executed QUERY_PROFILER_N_PLUS_ONE times or more in one request
+# is the signature of a lazy load in a loop and is flagged as a likely N+1.
+#
+# Each profile can be reported as X-Query-* response headers, as a panel
+# appended to HTML pages, and as one NDJSON line in QUERY_PROFILER_DUMP.
+# Per-endpoint totals for this worker are served at /metrics/queries.
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r'\bIN\s*\((?:[^()]|\([^()]*\))*\)', re.IGNORECASE)
+_SPACE = re.compile(r'\s+')
+
+
+def fingerprint(statement):
+    """The statement with whitespace normalised and literals/IN lists collapsed."""
+    statement = _IN_LISTS.sub('IN (...)', statement)
+    statement = _LITERALS.sub('?', statement)
+    return _SPACE.sub(' ', statement).strip()
+
+
+class RequestProfile:
+    """The statements of one request."""
+
+    def __init__(self, endpoint, method, path):
+        self.endpoint = endpoint
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.duration = None
+        self.status = None
+        self.statements = 0
+        self.db_time = 0.0
+        self.fingerprints = defaultdict(lambda: [0, 0.0])  # fingerprint -> [count, seconds]
+
+    def record(self, statement, seconds):
+        self.statements += 1
+        self.db_time += seconds
+        entry = self.fingerprints[fingerprint(statement)]
+        entry[0] += 1
+        entry[1] += seconds
+
+    def finish(self, status):
+        self.status = status
+        self.duration = time.perf_counter() - self.started
+
+    def duplicates(self):
+        """(fingerprint, count, seconds) of statements run more than once, most frequent first."""
+        return sorted(
+            ((fp, count, seconds) for fp, (count, seconds) in self.fingerprints.items() if count > 1),
+            key=lambda item: -item[1]
+        )
+
+    def n_plus_one(self, threshold):
+        return [item for item in self.duplicates() if item[1] >= threshold]
+
+    def to_dict(self, threshold):
+        return {
+            'endpoint': self.endpoint,
+            'method': self.method,
+            'path': self.path,
+            'status': self.status,
+            'duration_ms': round((self.duration or 0) * 1000, 2),
+            'statements': self.statements,
+            'db_time_ms': round(self.db_time * 1000, 2),
+            'duplicates': [
+                {'statement': fp, 'count': count, 'time_ms': round(seconds * 1000, 2)}
+                for fp, count, seconds in self.duplicates()
+            ],
+            'n_plus_one': [fp for fp, _, _ in self.n_plus_one(threshold)],
+        }
+
+
+class EndpointStats:
+    """Running totals of the request profiles of one endpoint."""
+
+    def __init__(self):
+        self.requests = 0
+        self.statements = 0
+        self.max_statements = 0
+        self.db_time = 0.0
+        self.n_plus_one = 0  # requests with at least one flagged fingerprint
+
+    def add(self, profile, flagged):
+        self.requests += 1
+        self.statements += profile.statements
+        self.max_statements = max(self.max_statements, profile.statements)
+        self.db_time += profile.db_time
+        self.n_plus_one += bool(flagged)
+
+    def to_dict(self):
+        return {
+            'requests': self.requests,
+            'statements': self.statements,
+            'mean_statements': round(self.statements / self.requests, 2) if self.requests else 0,
+            'max_statements': self.max_statements,
+            'db_time_ms': round(self.db_time * 1000, 2),
+            'n_plus_one_requests': self.n_plus_one,
+        }
+
+
+class QueryProfiler:
+    """Flask extension profiling the SQL statements of each request.
+
+    Each app keeps its per-endpoint totals in ``app.extensions['query_profiler']``
+    and is configured by its own config.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['query_profiler'] = defaultdict(EndpointStats)
+        if not app.config.get('QUERY_PROFILER'):
+            return
+        app.before_request(self._start)
+        app.after_request(self._report)
+        app.teardown_request(self._finish)
+        _listen()
+
+    @property
+    def config(self):
+        return current_app.config
+
+    @property
+    def endpoints(self):
+        """Totals per endpoint of the current app."""
+        return current_app.extensions['query_profiler']
+
+    @property
+    def threshold(self):
+        return self.config['QUERY_PROFILER_N_PLUS_ONE']
+
+    def _start(self):
+        g.query_profile = RequestProfile(request.endpoint, request.method, request.full_path.rstrip('?'))
+
+    def _report(self, response):
+        profile = g.get('query_profile')
+        if profile is None:
+            return response
+        profile.finish(response.status_code)
+        flagged = profile.n_plus_one(self.threshold)
+        if self.config['QUERY_PROFILER_HEADERS']:
+            response.headers['X-Query-Count'] = str(profile.statements)
+            response.headers['X-Query-Time'] = f'{profile.db_time * 1000:.2f}ms'
+            response.headers['X-Query-N-Plus-One'] = str(len(flagged))
+        if (self.config['QUERY_PROFILER_PANEL'] and response.mimetype == 'text/html'
+                and not response.is_streamed):
+            panel = render_template('layouts/query_panel.html', profile=profile, flagged=flagged)
+            html = response.get_data(as_text=True)
+            head, body_end, tail = html.rpartition('</body>')
+            response.set_data(head + panel + body_end + tail if body_end else html + panel)
+        return response
+
+    def _finish(self, exc):
+        # Runs after streamed responses are exhausted, so their statements count too
+        profile = g.pop('query_profile', None)
+        if profile is None:
+            return
+        if profile.duration is None:
+            profile.finish(500)
+        flagged = profile.n_plus_one(self.threshold)
+        for statement, count, _ in flagged:
+            current_app.logger.warning('Likely N+1 in %s: %d x %s', profile.endpoint, count, statement)
+        with self._lock:
+            self.endpoints[profile.endpoint or profile.path].add(profile, flagged)
+            path = self.config.get('QUERY_PROFILER_DUMP')
+            if path:
+                with open(path, 'a') as f:
+                    f.write(json.dumps(profile.to_dict(self.threshold)) + '\n')
+
+    def snapshot(self):
+        with self._lock:
+            return {endpoint: stats.to_dict() for endpoint, stats in sorted(self.endpoints.items())}
+
+
+profiler = QueryProfiler()
+
+#  Engine events
+#  ----------------------------------------------------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_start'].pop()
+    if has_request_context():
+        profile = g.get('query_profile')
+        if profile is not None:
+            profile.record(statement, time.perf_counter() - started)
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None and conn.info.get('query_start'):
+        conn.info['query_start'].pop()
+
+
+def _listen():
+    if not event.contains(Engine, 'after_cursor_execute', _after_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
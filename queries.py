@@ -0,0 +1,246 @@
+from datetime import datetime
+from itertools import groupby
+
+from sqlalchemy import tuple_
+
+from models import db, Venue, Artist, Show
+
+#----------------------------------------------------------------------------#
+# Query layer.
+#----------------------------------------------------------------------------#
+# Set-based read queries used by the controllers in app.py. Each page is built
+# from a single statement with one captured "now", instead of walking lazy
+# relationships per row. Statement builders are kept separate from the code
+# that shapes their rows so other executors can reuse them.
+
+#  Genres
+#  ----------------------------------------------------------------
+# Listings and searches can be narrowed to rows having all of some genres. The
+# containment test (genres @> ARRAY[...]) is served by the GIN indexes on the
+# genres columns instead of scanning every row's array. On SQLite, where the
+# lists are JSON, each genre is looked up with json_each().
+
+def with_genres(query, model, genres):
+    """``query`` restricted to ``model`` rows listing every genre in ``genres``."""
+    if not genres:
+        return query
+    genres = sorted(set(genres))
+    if db.engine.dialect.name == 'postgresql':
+        return query.where(model.genres.contains(genres))
+    for genre in genres:
+        listed = db.func.json_each(model.genres).table_valued('value')
+        query = query.where(db.select(listed.c.value).where(listed.c.value == genre).exists())
+    return query
+
+#  Home
+#  ----------------------------------------------------------------
+
+def recent_listings_query(model, limit=10):
+    return db.select(model.id, model.name).order_by(model.id.desc()).limit(limit)
+
+
+def build_listing(rows):
+    return [{"id": row.id, "name": row.name} for row in rows]
+
+
+def recent_listings(limit=10):
+    """The most recently listed artists and venues, as plain dicts."""
+    def recent(model):
+        return build_listing(db.session.execute(recent_listings_query(model, limit)))
+    return {"artists": recent(Artist), "venues": recent(Venue)}
+
+#  Venues
+#  ----------------------------------------------------------------
+
+def venue_areas_query(genres=()):
+    """Venues with their upcoming show count, ordered by area."""
+    query = (
+        db.select(
+            Venue.id,
+            Venue.name,
+            Venue.city,
+            Venue.state,
+            Venue.upcoming_shows_count.label('num_upcoming_shows'),
+        )
+        .order_by(Venue.state, Venue.city, Venue.id)
+    )
+    return with_genres(query, Venue, genres)
+
+
+def build_areas(rows):
+    """Group ``venue_areas_query`` rows into the city/state structure of venues.html."""
+    areas = []
+    for (city, state), venues in groupby(rows, key=lambda row: (row.city, row.state)):
+        areas.append({
+            "city": city,
+            "state": state,
+            "venues": [{
+                "id": row.id,
+                "name": row.name,
+                "num_upcoming_shows": row.num_upcoming_shows
+            } for row in venues]
+        })
+    return areas
+
+
+def venue_areas(genres=()):
+    """Area -> venues -> upcoming show count, from the venue counters."""
+    return build_areas(db.session.execute(venue_areas_query(genres)))
+
+#  Artists
+#  ----------------------------------------------------------------
+
+def artist_list_query(genres=()):
+    return with_genres(db.select(Artist.id, Artist.name).order_by(Artist.id), Artist, genres)
+
+
+def artist_list(genres=()):
+    return build_listing(db.session.execute(artist_list_query(genres)))
+
+#  Shows
+#  ----------------------------------------------------------------
+
+def show_feed_query(after=None, limit=50):
+    """Shows joined to their venue and artist, keyset-paginated on (start_time, id)."""
+    query = (
+        db.select(
+            Show.id,
+            Show.start_time,
+            Show.venue_id,
+            Venue.name.label('venue_name'),
+            Show.artist_id,
+            Artist.name.label('artist_name'),
+            Artist.image_link.label('artist_image_link'),
+        )
+        .join(Venue, Show.venue_id == Venue.id)
+        .join(Artist, Show.artist_id == Artist.id)
+        .order_by(Show.start_time, Show.id)
+        .limit(limit)
+    )
+    if after is not None:
+        query = query.where(tuple_(Show.start_time, Show.id) > tuple_(*after))
+    return query
+
+
+def encode_cursor(start_time, show_id):
+    return f"{start_time.isoformat()}_{show_id}"
+
+
+def decode_cursor(cursor):
+    """Parse a cursor from ``encode_cursor``; returns None if it is malformed."""
+    try:
+        start_time, show_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(start_time), int(show_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def build_show_feed(rows, limit):
+    """Shape ``show_feed_query(..., limit + 1)`` rows into (shows, next cursor)."""
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].start_time, rows[-1].id)
+    shows = [{
+        "venue_id": row.venue_id,
+        "venue_name": row.venue_name,
+        "artist_id": row.artist_id,
+        "artist_name": row.artist_name,
+        "artist_image_link": row.artist_image_link,
+        "start_time": row.start_time
+    } for row in rows]
+    return shows, next_cursor
+
+
+def show_feed(cursor=None, limit=50):
+    """One page of the show feed and the cursor of the next page, if any."""
+    rows = db.session.execute(
+        show_feed_query(decode_cursor(cursor) if cursor else None, limit + 1)
+    ).all()
+    return build_show_feed(rows, limit)
+
+#  Detail pages
+#  ----------------------------------------------------------------
+
+def detail_shows_query(entity_key, entity_id, other):
+    """All shows of one venue or artist, with the other side's name and image."""
+    other_key = Show.artist_id if other is Artist else Show.venue_id
+    return (
+        db.select(
+            other_key.label('other_id'),
+            other.name.label('other_name'),
+            other.image_link.label('other_image_link'),
+            Show.start_time,
+        )
+        .join(other, other_key == other.id)
+        .where(entity_key == entity_id)
+        .order_by(Show.start_time)
+    )
+
+
+def split_shows(rows, prefix, now):
+    """Partition detail rows into past and upcoming shows around ``now``."""
+    past_shows, upcoming_shows = [], []
+    for row in rows:
+        show = {
+            f"{prefix}_id": row.other_id,
+            f"{prefix}_name": row.other_name,
+            f"{prefix}_image_link": row.other_image_link,
+            "start_time": row.start_time
+        }
+        (upcoming_shows if row.start_time > now else past_shows).append(show)
+    return {
+        "past_shows": past_shows,
+        "upcoming_shows": upcoming_shows,
+        "past_shows_count": len(past_shows),
+        "upcoming_shows_count": len(upcoming_shows)
+    }
+
+
+def venue_detail(venue):
+    """The venue fields of show_venue.html; shows come from ``venue_shows``."""
+    return {
+        "id": venue.id,
+        "name": venue.name,
+        "genres": venue.genres,
+        "address": venue.address,
+        "city": venue.city,
+        "state": venue.state,
+        "phone": venue.phone,
+        "website": venue.website,
+        "facebook_link": venue.facebook_link,
+        "seeking_talent": venue.seeking_talent,
+        "seeking_description": venue.seeking_description,
+        "image_link": venue.image_link,
+    }
+
+
+def artist_detail(artist):
+    """The artist fields of show_artist.html; shows come from ``artist_shows``."""
+    return {
+        "id": artist.id,
+        "name": artist.name,
+        "genres": artist.genres,
+        "city": artist.city,
+        "state": artist.state,
+        "phone": artist.phone,
+        "website": artist.website,
+        "facebook_link": artist.facebook_link,
+        "seeking_venue": artist.seeking_venue,
+        "seeking_description": artist.seeking_description,
+        "image_link": artist.image_link,
+    }
+
+
+def venue_shows(venue_id, now=None):
+    """Past/upcoming shows of a venue with their artists, in one query."""
+    now = now or datetime.now()
+    rows = db.session.execute(detail_shows_query(Show.venue_id, venue_id, Artist))
+    return split_shows(rows, 'artist', now)
+
+
+def artist_shows(artist_id, now=None):
+    """Past/upcoming shows of an artist with their venues, in one query."""
+    now = now or datetime.now()
+    rows = db.session.execute(detail_shows_query(Show.artist_id, artist_id, Venue))
+    return split_shows(rows, 'venue', now)
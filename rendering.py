@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import defaultdict
+
+import click
+from flask import current_app, g, before_render_template, template_rendered
+from flask.cli import AppGroup
+from jinja2 import FileSystemBytecodeCache
+
+#----------------------------------------------------------------------------#
+# Template rendering.
+#----------------------------------------------------------------------------#
+# With TEMPLATE_PRECOMPILE set (the default outside DEBUG), every template is
+# compiled when a serving process warms up (startup.warm_up), so a cold
+# worker's first requests do not pay for it; CLI commands skip it. Templates
+# are not rechecked for changes, and the compiled code goes to a bytecode
+# cache in TEMPLATE_CACHE_DIR. Workers and restarts load that code instead of
+# parsing the sources again. `flask templates compile` fills
+# the cache at build time. Entries are keyed by the template source, so an
+# edited template is never served from a stale entry.
+#
+# With TEMPLATE_TIMING set, render_template calls are timed per template.
+# The totals for this worker are served at /metrics/templates, and each
+# response carries the time it spent rendering in X-Render-Time.
+
+templates_cli = AppGroup('templates', help='Precompile the Jinja templates.')
+
+
+class TemplateStats:
+    """Running totals of the renders of one template."""
+
+    def __init__(self):
+        self.renders = 0
+        self.time = 0.0
+        self.max_time = 0.0
+
+    def add(self, seconds):
+        self.renders += 1
+        self.time += seconds
+        self.max_time = max(self.max_time, seconds)
+
+    def to_dict(self):
+        return {
+            'renders': self.renders,
+            'time_ms': round(self.time * 1000, 2),
+            'mean_ms': round(self.time / self.renders * 1000, 3) if self.renders else 0,
+            'max_ms': round(self.max_time * 1000, 3),
+        }
+
+
+class TemplateRendering:
+    """Flask extension for the bytecode cache, precompilation and render timing."""
+
+    def __init__(self, app=None):
+        self.templates = defaultdict(TemplateStats)
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['template_rendering'] = self
+        if app.config.get('TEMPLATE_PRECOMPILE'):
+            # TEMPLATES_AUTO_RELOAD is off with it in config.py
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache(app.config.get('TEMPLATE_CACHE_DIR'))
+        if app.config.get('TEMPLATE_TIMING'):
+            before_render_template.connect(self._start, app)
+            template_rendered.connect(self._finish, app)
+            app.after_request(self._report)
+
+    def compile(self, app):
+        """Load every template into the environment, compiling those not in the bytecode cache."""
+        names = app.jinja_env.list_templates(filter_func=lambda name: name.endswith('.html'))
+        for name in names:
+            app.jinja_env.get_template(name)
+        return names
+
+    def _start(self, app, template, context, **extra):
+        g.setdefault('render_starts', []).append(time.perf_counter())
+
+    def _finish(self, app, template, context, **extra):
+        starts = g.get('render_starts')
+        if not starts:
+            return
+        seconds = time.perf_counter() - starts.pop()
+        g.render_time = g.get('render_time', 0.0) + seconds
+        with self._lock:
+            self.templates[template.name].add(seconds)
+
+    def _report(self, response):
+        if 'render_time' in g:
+            response.headers['X-Render-Time'] = f'{g.render_time * 1000:.2f}ms'
+        return response
+
+    def snapshot(self):
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in sorted(self.templates.items())}
+
+
+rendering = TemplateRendering()
+
+
+@templates_cli.command('compile')
+def compile_command():
+    """Compile all templates into the bytecode cache."""
+    app = current_app._get_current_object()
+    if app.jinja_env.bytecode_cache is None:
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(app.config.get('TEMPLATE_CACHE_DIR'))
+    names = rendering.compile(app)
+    click.echo(f'{len(names)} templates compiled.')
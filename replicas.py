@@ -0,0 +1,217 @@
+import itertools
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, has_app_context, has_request_context, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session as BaseSession
+
+#----------------------------------------------------------------------------#
+# Read replicas.
+#----------------------------------------------------------------------------#
+# With SQLALCHEMY_REPLICA_URIS set, each replica becomes a bind (replica_0,
+# replica_1, ...) and views marked @read_only run their SELECTs on one of them,
+# picked round-robin per request. Writes, locking reads, and anything run after
+# the session has written in the request stay on the primary, as do all other
+# views.
+#
+# Replicas lag. Each replica's lag and replayed WAL position are checked every
+# REPLICA_LAG_CHECK_INTERVAL seconds; replicas more than REPLICA_MAX_LAG behind,
+# or unreachable, are skipped. A user who commits a write has the primary's WAL
+# position kept in their session cookie, and their reads stay on the primary
+# until a replica has replayed past it, so they see their own changes. Where
+# there is no WAL position to compare (not PostgreSQL), they stay on the
+# primary for REPLICA_MAX_LAG seconds. When no replica qualifies, reads go to
+# the primary.
+
+WRITE_KEY = '_db_write'  # [time of the user's last write, primary WAL position or None]
+
+# Seconds behind (0 when caught up or not a standby) and WAL replayed, of a replica
+PG_STATUS = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END,"
+    " pg_last_wal_replay_lsn()::text"
+)
+# Where the primary is inserting WAL: past every record written by the transaction running this
+PG_POSITION = text("SELECT pg_current_wal_insert_lsn()::text")
+
+
+def parse_lsn(lsn):
+    """A PostgreSQL LSN ('16/B374D848') as an int, or None."""
+    if lsn is None:
+        return None
+    high, low = lsn.split('/')
+    return (int(high, 16) << 32) + int(low, 16)
+
+
+class RoutingSession(Session):
+    """Session that reads from the replica chosen for the request, if any."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not self.info.get('wrote') and _replica_safe(clause):
+            key = g.get('read_replica') if has_app_context() else None
+            if key is not None:
+                return self._db.engines[key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _replica_safe(clause):
+    """Plain SELECTs only: no DML, text or row locks."""
+    return getattr(clause, 'is_select', False) and getattr(clause, '_for_update_arg', None) is None
+
+
+class ReplicaSet:
+    """The replica binds of one app and their last known status."""
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.cycle = itertools.cycle(keys)
+        self.lock = threading.Lock()
+        self.status = {}  # bind key -> ((seconds behind, replayed WAL position), checked at)
+
+
+class Replicas:
+    """Flask extension adding the replica binds and choosing one per read-only request.
+
+    Each app keeps its replicas in ``app.extensions['replicas']``, a ReplicaSet.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Register the replica binds. Call after ``dbpool.init_app``, before ``db.init_app``.
+
+        Replicas get the pool and connection options of the primary, which
+        Flask-SQLAlchemy would otherwise apply to the default bind only.
+        """
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+        keys = []
+        for i, url in enumerate(app.config.get('SQLALCHEMY_REPLICA_URIS') or ()):
+            key = f'replica_{i}'
+            binds[key] = {**options, 'url': url}
+            keys.append(key)
+        app.config['SQLALCHEMY_BINDS'] = binds
+        app.extensions['replicas'] = ReplicaSet(keys)
+        _listen()
+
+    @property
+    def current(self):
+        """The ReplicaSet of the current app, or None."""
+        return current_app.extensions.get('replicas') if has_app_context() else None
+
+    @property
+    def keys(self):
+        current = self.current
+        return current.keys if current is not None else []
+
+    def status(self, key):
+        """(seconds behind, WAL position replayed) of replica ``key``; (None, None) if unreachable."""
+        current = self.current
+        interval = current_app.config.get('REPLICA_LAG_CHECK_INTERVAL', 1)
+        with current.lock:
+            status, checked_at = current.status.get(key, ((None, None), None))
+            if checked_at is not None and time.monotonic() - checked_at < interval:
+                return status
+            # Checked as of now: until the probe below is done, other requests use the last status
+            current.status[key] = (status, time.monotonic())
+        engine = current_app.extensions['sqlalchemy'].engines[key]
+        try:
+            with engine.connect() as connection:
+                if engine.dialect.name == 'postgresql':
+                    lag, replayed = connection.execute(PG_STATUS).one()
+                    status = (float(lag), parse_lsn(replayed))
+                else:
+                    status = (0.0, None)
+        except DBAPIError as error:
+            current_app.logger.warning('Replica %s is unavailable: %s', key, error)
+            status = (None, None)
+        with current.lock:
+            current.status[key] = (status, time.monotonic())
+        return status
+
+    def pick(self):
+        """The bind key of a replica that can serve this request, or None for the primary."""
+        current = self.current
+        if current is None or not current.keys:
+            return None
+        max_lag = current_app.config.get('REPLICA_MAX_LAG', 5)
+        write = session.get(WRITE_KEY)
+        if write is not None and time.time() - write[0] > max_lag:
+            session.pop(WRITE_KEY)  # every replica still in use has replayed it by now
+            write = None
+        for _ in current.keys:
+            with current.lock:
+                key = next(current.cycle)
+            lag, replayed = self.status(key)
+            if lag is None or lag > max_lag:
+                continue
+            if write is not None and (replayed is None or write[1] is None or replayed <= parse_lsn(write[1])):
+                continue  # has not replayed this user's last write yet
+            return key
+        return None
+
+
+replicas = Replicas()
+
+
+def read_only(view):
+    """Let the SELECTs of ``view``, including streamed responses, run on a replica."""
+    @wraps(view)
+    def routed(*args, **kwargs):
+        g.read_replica = replicas.pick()
+        return view(*args, **kwargs)
+    return routed
+
+#  Writes
+#  ----------------------------------------------------------------
+# A session that flushes or executes DML reads from the primary for the rest of
+# its transaction; committing it records the write in the user's session. The
+# WAL position is read on the session's own connection just before COMMIT, so
+# no second connection is checked out. Only the commit record can follow it,
+# and a replica must have replayed past it before the user reads from it.
+
+def _after_flush(db_session, flush_context):
+    db_session.info['wrote'] = True
+
+
+def _do_orm_execute(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['wrote'] = True
+
+
+def _before_commit(db_session):
+    if db_session.info.get('wrote') and replicas.keys and has_request_context():
+        db_session.info['position'] = _position(db_session)
+
+
+def _after_commit(db_session):
+    if db_session.info.pop('wrote', False) and replicas.keys and has_request_context():
+        session[WRITE_KEY] = [time.time(), db_session.info.pop('position', None)]
+
+
+def _position(db_session):
+    """The primary's WAL position in the session's transaction, or None where there is none to compare."""
+    connection = db_session.connection()
+    if connection.dialect.name != 'postgresql':
+        return None
+    return connection.scalar(PG_POSITION)
+
+
+def _after_rollback(db_session):
+    db_session.info.pop('wrote', None)
+    db_session.info.pop('position', None)
+
+
+def _listen():
+    if not event.contains(BaseSession, 'after_commit', _after_commit):
+        event.listen(BaseSession, 'after_flush', _after_flush)
+        event.listen(BaseSession, 'do_orm_execute', _do_orm_execute)
+        event.listen(BaseSession, 'before_commit', _before_commit)
+        event.listen(BaseSession, 'after_commit', _after_commit)
+        event.listen(BaseSession, 'after_rollback', _after_rollback)
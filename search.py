@@ -0,0 +1,136 @@
+import operator
+import re
+from functools import reduce
+
+from flask import current_app
+from sqlalchemy import func
+
+from models import db
+from queries import with_genres
+
+#----------------------------------------------------------------------------#
+# Search.
+#----------------------------------------------------------------------------#
+# Partial, case-insensitive search over Venue and Artist. On PostgreSQL the
+# ILIKE filters are served by the pg_trgm GIN indexes and results are ranked
+# with similarity(); other databases (SQLite in tests) use the same filters
+# and rank in Python with an equivalent trigram similarity. Searches can be
+# narrowed to some genres, as the listings can (queries.with_genres).
+
+def parse_search_term(search_term):
+    """Map a search box value to the columns it should match.
+
+    "City, State" searches by location, anything else by name.
+    """
+    search_terms = search_term.split(",")
+    if len(search_terms) == 2:
+        return {"city": search_terms[0].strip(), "state": search_terms[1].strip()}
+    return {"name": search_term}
+
+
+def _escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _filters(model, terms):
+    return [
+        getattr(model, column).ilike(f"%{_escape_like(term)}%", escape='\\')
+        for column, term in terms.items()
+    ]
+
+
+def trigrams(text):
+    """The set of trigrams pg_trgm extracts from ``text``."""
+    grams = set()
+    for word in re.findall(r'[^\W_]+', text.lower()):
+        word = f"  {word} "
+        grams.update(word[i:i + 3] for i in range(len(word) - 2))
+    return grams
+
+
+def similarity(a, b):
+    """Python equivalent of pg_trgm's similarity(a, b)."""
+    a, b = trigrams(a or ''), trigrams(b or '')
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class TrigramSearch:
+    """Ranked search backed by the pg_trgm GIN indexes on PostgreSQL."""
+
+    def query(self, model, terms, limit=None, genres=()):
+        ranks = [func.similarity(getattr(model, column), term) for column, term in terms.items()]
+        rank = reduce(operator.add, ranks)
+        query = (
+            db.select(model)
+            .where(*_filters(model, terms))
+            .order_by(rank.desc(), model.name, model.id)
+            .limit(limit)
+        )
+        return with_genres(query, model, genres)
+
+    def rank(self, results, terms, limit=None):
+        return results
+
+    def search(self, model, search_term, limit=None, genres=()):
+        terms = parse_search_term(search_term)
+        return self.rank(db.session.scalars(self.query(model, terms, limit, genres)).all(), terms, limit)
+
+
+class PythonSearch:
+    """Portable search: SQL LIKE filtering, trigram ranking in Python."""
+
+    def query(self, model, terms, limit=None, genres=()):
+        return with_genres(db.select(model).where(*_filters(model, terms)), model, genres)
+
+    def rank(self, results, terms, limit=None):
+        results = sorted(results, key=lambda result: (
+            -sum(similarity(getattr(result, column), term) for column, term in terms.items()),
+            result.name,
+            result.id
+        ))
+        return results[:limit]
+
+    def search(self, model, search_term, limit=None, genres=()):
+        terms = parse_search_term(search_term)
+        return self.rank(db.session.scalars(self.query(model, terms, limit, genres)).all(), terms, limit)
+
+
+ENGINES = {
+    'trigram': TrigramSearch,
+    'python': PythonSearch,
+}
+
+
+def search_engine(dialect_name=None):
+    """The engine named by SEARCH_ENGINE, or the best one for the database."""
+    name = current_app.config.get('SEARCH_ENGINE', 'auto')
+    if name == 'auto':
+        dialect_name = dialect_name or db.engine.dialect.name
+        name = 'trigram' if dialect_name == 'postgresql' else 'python'
+    return ENGINES[name]()
+
+
+def search(model, search_term, limit=None, genres=()):
+    return search_engine().search(model, search_term, limit, genres)
+
+
+def build_results(matches, limit):
+    """The search page payload from up to ``limit + 1`` ranked matches."""
+    has_more = len(matches) > limit
+    matches = matches[:limit]
+    return {
+        "count": len(matches),
+        "has_more": has_more,
+        "data": [{
+            "id": match.id,
+            "name": match.name,
+            "num_upcoming_shows": match.upcoming_shows_count
+        } for match in matches]
+    }
+
+
+def search_results(model, search_term, limit, genres=()):
+    """The search page payload: at most ``limit`` matches with upcoming show counts."""
+    return build_results(search(model, search_term, limit + 1, genres), limit)
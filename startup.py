@@ -0,0 +1,109 @@
+import gc
+import importlib
+import os
+import sys
+from collections import defaultdict
+
+import click
+from flask.cli import AppGroup
+
+#----------------------------------------------------------------------------#
+# Startup.
+#----------------------------------------------------------------------------#
+# app.create_app() imports only what serving a request needs. The form classes
+# (WTForms), babel, dateutil, Alembic and the modules behind the bulk CLI
+# commands load on first use: forms when a form view runs, babel when a date
+# is first formatted, and each CLI command when it is invoked, so `flask db
+# upgrade` does not import the importer and `flask import` does not import
+# Alembic.
+#
+# Serving processes undo that with warm_up(), which imports the deferred
+# modules, compiles the templates and moves everything loaded so far out of
+# the garbage collector's reach. Under `gunicorn --preload wsgi:app` this
+# happens once in the master, and forked workers share those pages instead of
+# each importing, compiling and (through gc writes) copying them.
+#
+# `flask startup report` shows where the import time of create_app() goes.
+
+# Modules create_app() must not import: warm_up() loads the first, the CLI the others
+DEFERRED = ('forms', 'wtforms', 'flask_wtf', 'babel.dates', 'dateutil.parser')
+CLI_ONLY = ('flask_migrate', 'alembic', 'importer', 'synthetic')
+
+startup_cli = AppGroup('startup', help='Inspect the startup time of the application.')
+
+
+class LazyCommand(click.Command):
+    """A CLI command that imports its implementation only when it is run.
+
+    ``loader`` is an import path ('module:attribute') or a function returning
+    the command; ``flask --help`` lists it without importing either.
+    """
+
+    def __init__(self, name, loader, help=None):
+        super().__init__(name, help=help, short_help=help)
+        self.loader = loader
+        self._command = None
+
+    def load(self):
+        if self._command is None:
+            if callable(self.loader):
+                self._command = self.loader()
+            else:
+                module, attribute = self.loader.split(':')
+                self._command = getattr(importlib.import_module(module), attribute)
+        return self._command
+
+    def make_context(self, info_name, args, parent=None, **extra):
+        # The real command parses the arguments, so it is what gets invoked
+        return self.load().make_context(info_name, args, parent=parent, **extra)
+
+
+def warm_up(app):
+    """Load what create_app() deferred and freeze it, before serving (or forking)."""
+    for module in DEFERRED:
+        importlib.import_module(module)
+    rendering = app.extensions.get('template_rendering')
+    if rendering is not None and app.config.get('TEMPLATE_PRECOMPILE'):
+        rendering.compile(app)
+    gc.collect()
+    gc.freeze()  # keeps the collector from writing to, and so copying, the preloaded objects
+    return app
+
+#  Import-time report
+#  ----------------------------------------------------------------
+
+def parse_importtime(output):
+    """{module: (self µs, cumulative µs)} from the stderr of ``python -X importtime``."""
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times.setdefault(name.strip(), (int(self_us), int(cumulative_us)))
+    return times
+
+
+def import_times(statement='import app; app.create_app()'):
+    import subprocess
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode:
+        raise click.ClickException(result.stderr.strip().splitlines()[-1])
+    return parse_importtime(result.stderr)
+
+
+@startup_cli.command('report')
+@click.option('--limit', default=15, show_default=True, help='Packages to list.')
+def report_command(limit):
+    """Time the imports of create_app() in a fresh interpreter."""
+    times = import_times()
+    packages = defaultdict(int)
+    for name, (self_us, _) in times.items():
+        packages[name.split('.')[0]] += self_us
+    total = sum(packages.values())
+    click.echo(f'{len(times)} modules imported in {total / 1000:.0f} ms.')
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:limit]:
+        click.echo(f'{self_us / 1000:8.1f} ms  {package}')
+    loaded = [module for module in DEFERRED + CLI_ONLY if module in times]
+    if loaded:
+        raise click.ClickException(f'Deferred modules imported at startup: {", ".join(loaded)}')
@@ -0,0 +1,203 @@
+import random
+import time
+from bisect import bisect
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+import click
+from flask.cli import with_appcontext
+
+from bookings import BookingIndex
+from cache import cache
+from importer import batched, write_rows, write_artists, write_shows
+from models import db, Venue, Artist, Show
+import validation
+
+#----------------------------------------------------------------------------#
+# Synthetic data.
+#----------------------------------------------------------------------------#
+# `flask generate --venues N --artists N --shows N --seed S` streams
+# production-shaped rows into the bulk writers of the importer, one batch at a
+# time. Venue and artist rows are not kept once written. Shows are placed
+# around the start times of every show, stored or generated, held in two
+# BookingIndexes, so memory grows with the number of shows (roughly 100 bytes
+# each). The same seed and --now produce the same rows; names are numbered
+# after the highest venue and artist ids, so loading the same seed again does
+# not repeat them.
+#
+# States follow population, cities the largest ones of each state. Genres come
+# from the choices of validation.py, weighted towards the common ones. Shows are Zipf-skewed
+# across venues and artists (a few busy venues, a long tail) and never overlap
+# at a venue or for an artist, so they satisfy the exclusion constraints on Show.
+
+# Population in millions and the largest cities, per state choice
+STATES = {
+    'AL': (5.0, ['Birmingham', 'Montgomery', 'Huntsville']), 'AK': (0.7, ['Anchorage']),
+    'AZ': (7.2, ['Phoenix', 'Tucson', 'Mesa']), 'AR': (3.0, ['Little Rock']),
+    'CA': (39.5, ['Los Angeles', 'San Diego', 'San Jose', 'San Francisco', 'Oakland']),
+    'CO': (5.8, ['Denver', 'Colorado Springs', 'Boulder']), 'CT': (3.6, ['Bridgeport', 'New Haven']),
+    'DE': (1.0, ['Wilmington']), 'DC': (0.7, ['Washington']),
+    'FL': (21.5, ['Jacksonville', 'Miami', 'Tampa', 'Orlando']), 'GA': (10.7, ['Atlanta', 'Savannah']),
+    'HI': (1.5, ['Honolulu']), 'ID': (1.8, ['Boise']), 'IL': (12.8, ['Chicago', 'Springfield']),
+    'IN': (6.8, ['Indianapolis', 'Fort Wayne']), 'IA': (3.2, ['Des Moines']), 'KS': (2.9, ['Wichita']),
+    'KY': (4.5, ['Louisville', 'Lexington']), 'LA': (4.7, ['New Orleans', 'Baton Rouge']),
+    'ME': (1.4, ['Portland']), 'MT': (1.1, ['Billings', 'Missoula']),
+    'NE': (2.0, ['Omaha', 'Lincoln']), 'NV': (3.1, ['Las Vegas', 'Reno']), 'NH': (1.4, ['Manchester']),
+    'NJ': (9.3, ['Newark', 'Jersey City']), 'NM': (2.1, ['Albuquerque', 'Santa Fe']),
+    'NY': (20.2, ['New York', 'Buffalo', 'Rochester']), 'NC': (10.4, ['Charlotte', 'Raleigh', 'Asheville']),
+    'ND': (0.8, ['Fargo']), 'OH': (11.8, ['Columbus', 'Cleveland', 'Cincinnati']),
+    'OK': (4.0, ['Oklahoma City', 'Tulsa']), 'OR': (4.2, ['Portland', 'Eugene']),
+    'MD': (6.2, ['Baltimore']), 'MA': (7.0, ['Boston', 'Cambridge']), 'MI': (10.1, ['Detroit', 'Grand Rapids']),
+    'MN': (5.7, ['Minneapolis', 'Saint Paul']), 'MS': (3.0, ['Jackson']),
+    'MO': (6.2, ['Kansas City', 'St. Louis']), 'PA': (13.0, ['Philadelphia', 'Pittsburgh']),
+    'RI': (1.1, ['Providence']), 'SC': (5.1, ['Charleston', 'Columbia']), 'SD': (0.9, ['Sioux Falls']),
+    'TN': (6.9, ['Nashville', 'Memphis', 'Knoxville']), 'TX': (29.1, ['Houston', 'San Antonio', 'Dallas', 'Austin']),
+    'UT': (3.3, ['Salt Lake City']), 'VT': (0.6, ['Burlington']), 'VA': (8.6, ['Virginia Beach', 'Richmond']),
+    'WA': (7.7, ['Seattle', 'Spokane']), 'WV': (1.8, ['Charleston']), 'WI': (5.9, ['Milwaukee', 'Madison']),
+    'WY': (0.6, ['Cheyenne']),
+}
+GENRE_WEIGHTS = {
+    'Rock n Roll': 10, 'Pop': 9, 'Hip-Hop': 8, 'Jazz': 6, 'Electronic': 6, 'Country': 5, 'R&B': 5,
+    'Alternative': 5, 'Blues': 4, 'Folk': 4, 'Funk': 3, 'Soul': 3, 'Punk': 3, 'Heavy Metal': 3,
+    'Reggae': 2, 'Classical': 2, 'Instrumental': 2, 'Musical Theatre': 1, 'Other': 1,
+}
+VENUE_WORDS = (['The Blue', 'The Velvet', 'Golden', 'Red Door', 'Electric', 'Midnight', 'Union', 'Echo'],
+               ['Room', 'Lounge', 'Hall', 'Ballroom', 'Tavern', 'Theatre', 'Garden', 'Warehouse'])
+ARTIST_WORDS = (['Silver', 'Wild', 'Neon', 'Lonesome', 'Brass', 'Paper', 'Static', 'Velvet'],
+                ['Foxes', 'Petals', 'Engines', 'Saints', 'Rivers', 'Ghosts', 'Collective', 'Quartet'])
+SHOW_SKEW = 1.1  # Zipf exponent of shows per venue and per artist
+SLOT = timedelta(minutes=30)  # show start times are rounded to this
+
+
+class Generator:
+    """Deterministic rows for a given seed."""
+
+    def __init__(self, seed=0, now=None, past_days=365, future_days=365):
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.now = (now or datetime.now()).replace(minute=0, second=0, microsecond=0)
+        self.start = self.now - timedelta(days=past_days)
+        self.slots = int(timedelta(days=past_days + future_days) / SLOT)
+        states = [state for state in validation.STATES if state in STATES]
+        self.states = states
+        self.state_weights = list(accumulate(STATES[state][0] for state in states))
+        self.genres = [genre for genre in validation.GENRES if genre in GENRE_WEIGHTS]
+        self.genre_weights = [GENRE_WEIGHTS[genre] for genre in self.genres]
+
+    def _place(self):
+        state = self.rng.choices(self.states, cum_weights=self.state_weights)[0]
+        return self.rng.choice(STATES[state][1]), state
+
+    def _genres(self):
+        picked = set(self.rng.choices(self.genres, weights=self.genre_weights, k=self.rng.randint(1, 3)))
+        return sorted(picked)
+
+    def _phone(self):
+        r = self.rng.randint
+        return f'{r(200, 999)}-{r(200, 999)}-{r(0, 9999):04d}'
+
+    def _name(self, words, i):
+        first, second = words
+        return f'{self.rng.choice(first)} {self.rng.choice(second)} {self.seed}-{i}'
+
+    def venues(self, n, first=1):
+        """``n`` venues, numbered from ``first`` in their names, which are unique."""
+        for i in range(first, first + n):
+            city, state = self._place()
+            seeking = self.rng.random() < 0.3
+            yield {
+                'name': self._name(VENUE_WORDS, i), 'city': city, 'state': state,
+                'address': f'{self.rng.randint(1, 9999)} {self.rng.choice(["Main", "Market", "Oak", "Elm"])} St',
+                'phone': self._phone(), 'genres': self._genres(), 'image_link': None,
+                'facebook_link': None, 'website': None,
+                'seeking_talent': seeking, 'seeking_description': 'Booking new acts' if seeking else None,
+            }
+
+    def artists(self, n, first=1):
+        """``n`` artists, numbered from ``first`` in their names, which are unique."""
+        # Every artist is available over the whole generated period
+        period = [(self.start, self.start + self.slots * SLOT)]
+        for i in range(first, first + n):
+            city, state = self._place()
+            seeking = self.rng.random() < 0.4
+            yield {
+                'name': self._name(ARTIST_WORDS, i), 'city': city, 'state': state,
+                'phone': self._phone(), 'genres': self._genres(), 'image_link': None,
+                'facebook_link': None, 'website': None,
+                'seeking_venue': seeking, 'seeking_description': 'Looking for venues' if seeking else None,
+                'availability': period,
+            }
+
+    def _skewed(self, ids):
+        """A picker of ids with Zipf-distributed frequencies; which ids are the busy ones is random."""
+        ids = list(ids)
+        self.rng.shuffle(ids)
+        cum_weights = list(accumulate(1 / (rank + 1) ** SHOW_SKEW for rank in range(len(ids))))
+        total = cum_weights[-1]
+        return lambda: ids[bisect(cum_weights, self.rng.random() * total)]
+
+    def shows(self, n, venue_ids, artist_ids, bookings=None, attempts=20):
+        """Up to ``n`` shows; a show that cannot be placed in ``attempts`` tries is skipped."""
+        venue, artist = self._skewed(venue_ids), self._skewed(artist_ids)
+        venue_bookings, artist_bookings = bookings or (BookingIndex(), BookingIndex())
+        for _ in range(n):
+            for _ in range(attempts):
+                venue_id, artist_id = venue(), artist()
+                start_time = self.start + self.rng.randrange(self.slots) * SLOT
+                if (venue_bookings.conflict(venue_id, start_time) is None
+                        and artist_bookings.conflict(artist_id, start_time) is None):
+                    venue_bookings.add(venue_id, start_time)
+                    artist_bookings.add(artist_id, start_time)
+                    yield {'venue_id': venue_id, 'artist_id': artist_id, 'start_time': start_time}
+                    break
+
+#  Loading
+#  ----------------------------------------------------------------
+
+def load(model, rows, batch_size, write=write_rows):
+    """Write ``rows`` in batches, committing each; returns the number written."""
+    loaded, start = 0, time.perf_counter()
+    for batch in batched(rows, batch_size):
+        write(model, batch)
+        db.session.commit()
+        loaded += len(batch)
+        click.echo(f'{model.__tablename__}: {loaded} rows ({loaded / (time.perf_counter() - start):,.0f} rows/s)')
+    cache.invalidate(model)
+    return loaded
+
+
+def _ids_after(model, last_id):
+    return db.session.scalars(db.select(model.id).where(model.id > last_id).order_by(model.id)).all()
+
+
+def generate(venues, artists, shows, seed=0, batch_size=5000, now=None):
+    """Generate and load a dataset; returns the numbers of rows written."""
+    generator = Generator(seed, now)
+    last_venue_id = db.session.scalar(db.select(db.func.max(Venue.id))) or 0
+    last_artist_id = db.session.scalar(db.select(db.func.max(Artist.id))) or 0
+    # Ids only grow, so numbering after the highest one keeps new names apart from earlier runs'
+    load(Venue, generator.venues(venues, last_venue_id + 1), batch_size)
+    load(Artist, generator.artists(artists, last_artist_id + 1), batch_size, write_artists)
+    venue_ids, artist_ids = _ids_after(Venue, last_venue_id), _ids_after(Artist, last_artist_id)
+    # New shows must not overlap the ones already stored either
+    bookings = venue_bookings, artist_bookings = BookingIndex(), BookingIndex()
+    for venue_id, artist_id, start_time in db.session.execute(
+            db.select(Show.venue_id, Show.artist_id, Show.start_time).order_by(Show.start_time)).yield_per(batch_size):
+        venue_bookings.add(venue_id, start_time)
+        artist_bookings.add(artist_id, start_time)
+    loaded = load(Show, generator.shows(shows, venue_ids, artist_ids, bookings), batch_size, write_shows)
+    return len(venue_ids), len(artist_ids), loaded
+
+
+@click.command('generate')
+@click.option('--venues', default=1000, show_default=True)
+@click.option('--artists', default=1000, show_default=True)
+@click.option('--shows', default=20000, show_default=True)
+@click.option('--seed', default=0, show_default=True, help='Same seed, same rows.')
+@click.option('--now', type=click.DateTime(), help='Centre of the show period; defaults to the current hour.')
+@click.option('--batch-size', default=5000, show_default=True, help='Rows per COPY/INSERT.')
+@with_appcontext
+def generate_command(venues, artists, shows, seed, now, batch_size):
+    """Load a synthetic, production-shaped dataset."""
+    counts = generate(venues, artists, shows, seed, batch_size, now)
+    click.echo('Generated {} venues, {} artists and {} shows.'.format(*counts))
@@ -0,0 +1,47 @@
+import pytest
+
+import config
+from app import create_app
+from models import db
+
+#----------------------------------------------------------------------------#
+# Fixtures.
+#----------------------------------------------------------------------------#
+# Tests run on a SQLite file with the full schema. Modules can override
+# app_config, e.g. to add replica files (test_replicas.py).
+
+
+def make_config(**overrides):
+    """config.py with ``overrides`` applied, for create_app()."""
+    settings = {name: value for name, value in vars(config).items() if name.isupper()}
+    settings.update(overrides)
+    return type('TestConfig', (), settings)
+
+
+@pytest.fixture
+def app_config(tmp_path):
+    return {
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "primary.db"}',
+        'SQLALCHEMY_REPLICA_URIS': [],
+        'SEARCH_ENGINE': 'auto',
+    }
+
+
+@pytest.fixture
+def app(app_config):
+    app = create_app(make_config(**app_config))
+    app.config['WTF_CSRF_ENABLED'] = False  # create_app() turns it on
+    with app.app_context():
+        for engine in db.engines.values():
+            db.metadata.create_all(engine)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
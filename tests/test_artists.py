@@ -0,0 +1,42 @@
+from datetime import datetime
+
+import pytest
+
+from models import db, Artist, Availability
+
+EDIT = {'name': 'Band', 'city': 'New York', 'state': 'NY', 'phone': '123-123-1234', 'genres': ['Jazz']}
+
+
+@pytest.fixture
+def artist(app):
+    with app.app_context():
+        artist = Artist(name='Band', city='New York', state='NY', phone='123-123-1234', genres=['Jazz'],
+                        availability=[Availability(start_time=datetime(2035, 1, 1, 20, 0),
+                                                   end_time=datetime(2035, 1, 1, 21, 0))])
+        db.session.add(artist)
+        db.session.commit()
+        return artist.id
+
+
+def slots(app, artist_id):
+    with app.app_context():
+        return db.session.execute(
+            db.select(Availability.start_time, Availability.end_time).where(Availability.artist_id == artist_id)
+        ).all()
+
+
+def test_edit_replaces_availability(app, client, artist):
+    response = client.post(f'/artists/{artist}/edit',
+                           data={**EDIT, 'available_times': '2035-02-01 20:00:00/2035-02-01 23:00:00'})
+    assert response.status_code == 302
+    assert slots(app, artist) == [(datetime(2035, 2, 1, 20, 0), datetime(2035, 2, 1, 23, 0))]
+
+
+def test_edit_with_empty_availability_clears_it(app, client, artist):
+    client.post(f'/artists/{artist}/edit', data={**EDIT, 'available_times': ''})
+    assert slots(app, artist) == []
+
+
+def test_edit_without_the_availability_field_keeps_it(app, client, artist):
+    client.post(f'/artists/{artist}/edit', data=EDIT)
+    assert slots(app, artist) == [(datetime(2035, 1, 1, 20, 0), datetime(2035, 1, 1, 21, 0))]
@@ -0,0 +1,25 @@
+from app import create_app
+from cache import LRUCache, LocalClient, SharedCache, cache
+from conftest import make_config
+
+
+def test_shared_cache_clear_keeps_other_keys():
+    client = LocalClient()
+    client.set('session:abc', b'other app')
+    cache = SharedCache(client)
+    for i in range(1200):
+        cache.set(f'page:{i}', i)
+    cache.clear()
+    assert cache.get('page:0') is None
+    assert list(client.scan_iter(match=cache.prefix + '*')) == []
+    assert client.get('session:abc') == b'other app'
+
+
+def test_each_app_has_its_own_backend(app, tmp_path):
+    other = create_app(make_config(SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path / "other.db"}',
+                                   CACHE_TYPE='shared', CACHE_SHARED_URL='local://'))
+    with app.app_context():
+        assert isinstance(cache.backend, LRUCache)
+    with other.app_context():
+        assert isinstance(cache.backend, SharedCache)
+    assert cache.backend is None  # outside an app nothing is cached
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, Venue, Artist, Show
+
+
+@pytest.fixture
+def show(app):
+    """A venue and an artist, last edited yesterday, with one upcoming show."""
+    yesterday = datetime.now() - timedelta(days=1)
+    with app.app_context():
+        venue = Venue(name='Hall', city='New York', state='NY', address='1 Main St',
+                      phone='123-123-1234', genres=['Jazz'], updated_at=yesterday)
+        artist = Artist(name='Band', city='New York', state='NY', phone='123-123-1234', genres=['Jazz'],
+                        updated_at=yesterday)
+        db.session.add_all([venue, artist])
+        db.session.flush()
+        show = Show(venue_id=venue.id, artist_id=artist.id, start_time=datetime.now() + timedelta(hours=1))
+        db.session.add(show)
+        db.session.commit()
+        return show.id
+
+
+def start_show(app, show_id):
+    # As if the time had come: the rows' updated_at do not change
+    with app.app_context():
+        db.session.execute(db.update(Show).where(Show.id == show_id)
+                           .values(start_time=datetime.now() - timedelta(minutes=1)))
+        db.session.commit()
+
+
+@pytest.mark.parametrize('url', ['/venues/1', '/artists/1'])
+def test_unchanged_page_is_not_modified(client, show, url):
+    etag = client.get(url).headers['ETag']
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+
+@pytest.mark.parametrize('url', ['/venues/1', '/artists/1'])
+def test_page_changes_when_an_upcoming_show_starts(app, client, show, url):
+    first = client.get(url)
+    assert b'1 Upcoming Show' in first.data
+    start_show(app, show)
+
+    response = client.get(url, headers={'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != first.headers['ETag']
+    assert b'1 Past Show' in response.data
+    response = client.get(url, headers={'If-Modified-Since': first.headers['Last-Modified']})
+    assert response.status_code == 200
@@ -0,0 +1,52 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from importer import ShowRows, import_file, write_shows
+from models import db, Venue, Artist, Availability, Show
+from validation import Invalid, SHOW
+
+SHOW_TIME = datetime(2035, 1, 1, 20, 0)
+
+
+@pytest.fixture
+def booking(app):
+    with app.app_context():
+        venue = Venue(name='Hall', city='New York', state='NY', address='1 Main St',
+                      phone='123-123-1234', genres=['Jazz'])
+        artist = Artist(name='Band', city='New York', state='NY', phone='123-123-1234', genres=['Jazz'],
+                        availability=[Availability(start_time=datetime(2035, 1, 1),
+                                                   end_time=datetime(2035, 1, 2))])
+        db.session.add_all([venue, artist])
+        db.session.commit()
+        return venue.id, artist.id
+
+
+@pytest.mark.parametrize('venue_id', [[1], {'id': 1}, 'one', None])
+def test_show_rows_reject_non_integer_ids(app, booking, venue_id):
+    with app.app_context():
+        with pytest.raises(Invalid, match='must be integers'):
+            ShowRows()({'venue_id': venue_id, 'artist_id': booking[1], 'start_time': SHOW_TIME})
+
+
+def test_show_rows_reject_unavailable_artists(app, booking):
+    venue_id, artist_id = booking
+    with app.app_context():
+        rows = ShowRows()
+        with pytest.raises(Invalid, match='not available'):
+            rows({'venue_id': venue_id, 'artist_id': artist_id, 'start_time': datetime(2035, 1, 2, 20, 0)})
+        assert rows({'venue_id': venue_id, 'artist_id': artist_id, 'start_time': SHOW_TIME})['venue_id'] == venue_id
+
+
+def test_import_rejects_bad_rows_and_loads_the_rest(app, booking, tmp_path):
+    venue_id, artist_id = booking
+    path = tmp_path / 'shows.ndjson'
+    path.write_text('\n'.join(json.dumps(record) for record in (
+        {'venue_id': [venue_id], 'artist_id': artist_id, 'start_time': '2035-01-01 12:00:00'},
+        {'venue_id': venue_id, 'artist_id': artist_id, 'start_time': '2035-01-01 20:00:00'},
+    )))
+    with app.app_context():
+        loaded, rejected, _ = import_file(Show, SHOW, ShowRows(), str(path), 100, write_shows)
+        assert (loaded, rejected) == (1, 1)
+        assert db.session.scalars(db.select(Show.start_time)).all() == [SHOW_TIME]
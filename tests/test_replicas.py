@@ -0,0 +1,109 @@
+import time
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from conftest import make_config
+from models import db, Venue
+from replicas import WRITE_KEY
+
+# The venue exists on both databases under different names, so a page shows
+# which one it was read from.
+VENUE = {'id': 1, 'city': 'New York', 'state': 'NY', 'address': '1 Main St',
+         'phone': '123-123-1234', 'genres': ['Jazz']}
+EDIT = {'name': 'Renamed Hall', 'city': 'New York', 'state': 'NY', 'address': '1 Main St',
+        'phone': '123-123-1234', 'genres': ['Jazz']}
+
+
+@pytest.fixture
+def app_config(app_config, tmp_path):
+    return {**app_config, 'SQLALCHEMY_REPLICA_URIS': [f'sqlite:///{tmp_path / "replica.db"}']}
+
+
+@pytest.fixture
+def venue(app):
+    with app.app_context():
+        for key, name in ((None, 'Primary Hall'), ('replica_0', 'Replica Hall')):
+            with db.engines[key].begin() as connection:
+                connection.execute(db.insert(Venue), {**VENUE, 'name': name})
+
+
+@pytest.fixture
+def statements(app):
+    """(bind key, SQL verb) of every statement run, None being the primary."""
+    executed = []
+
+    def recorder(key):
+        def before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+            executed.append((key, statement.split(None, 1)[0].upper()))
+        return before_cursor_execute
+
+    with app.app_context():
+        for key, engine in db.engines.items():
+            event.listen(engine, 'before_cursor_execute', recorder(key))
+    return executed
+
+
+def binds(statements, verb=None):
+    return {key for key, statement_verb in statements if verb in (None, statement_verb)}
+
+
+def names(app):
+    found = {}
+    with app.app_context():
+        for key in (None, 'replica_0'):
+            with db.engines[key].connect() as connection:
+                found[key] = connection.scalar(db.select(Venue.name))
+    return found
+
+
+def test_read_only_views_read_from_a_replica(client, venue, statements):
+    for url in ('/venues/1', '/api/v1/venues/1'):
+        response = client.get(url)
+        assert response.status_code == 200
+        assert b'Replica Hall' in response.data
+    assert binds(statements) == {'replica_0'}
+
+
+def test_other_views_read_from_the_primary(client, venue, statements):
+    response = client.get('/venues/1/edit')
+    assert b'Primary Hall' in response.data
+    assert binds(statements) == {None}
+
+
+def test_writes_go_to_the_primary(app, client, venue, statements):
+    response = client.post('/venues/1/edit', data=EDIT)
+    assert response.status_code == 302
+    assert binds(statements, 'UPDATE') == {None}
+    assert binds(statements) == {None}
+    assert names(app) == {None: 'Renamed Hall', 'replica_0': 'Replica Hall'}
+
+
+def test_reads_after_a_write_go_to_the_primary_within_the_lag_window(app, client, venue, statements):
+    client.post('/venues/1/edit', data=EDIT)
+    statements.clear()
+    # SQLite has no WAL position to compare, so the user stays on the primary for REPLICA_MAX_LAG
+    assert b'Renamed Hall' in client.get('/venues/1').data
+    assert binds(statements) == {None}
+    # Other users still read from the replica
+    assert b'Replica Hall' in app.test_client().get('/venues/1').data
+
+    with client.session_transaction() as session:
+        written_at, position = session[WRITE_KEY]
+        session[WRITE_KEY] = [written_at - app.config['REPLICA_MAX_LAG'] - 1, position]
+    assert b'Replica Hall' in client.get('/venues/1').data
+    with client.session_transaction() as session:
+        assert WRITE_KEY not in session
+
+
+@pytest.mark.parametrize('status', [(60.0, None), (None, None)], ids=['lagging', 'unreachable'])
+def test_reads_skip_replicas_that_cannot_serve(app, client, venue, status):
+    app.extensions['replicas'].status['replica_0'] = (status, time.monotonic())
+    assert b'Primary Hall' in client.get('/venues/1').data
+
+
+def test_each_app_keeps_its_replicas(client, venue, tmp_path):
+    create_app(make_config(SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path / "other.db"}',
+                           SQLALCHEMY_REPLICA_URIS=[]))
+    assert b'Replica Hall' in client.get('/venues/1').data
@@ -0,0 +1,81 @@
+import pytest
+
+from models import db, Venue
+from search import PythonSearch, _escape_like, parse_search_term, search_engine, search_results, similarity
+
+
+def test_parse_search_term_by_location_or_name():
+    assert parse_search_term('San Francisco, CA') == {'city': 'San Francisco', 'state': 'CA'}
+    assert parse_search_term('The Musical Hop') == {'name': 'The Musical Hop'}
+    assert parse_search_term('a, b, c') == {'name': 'a, b, c'}
+
+
+def test_escape_like():
+    assert _escape_like('100%_\\') == '100\\%\\_\\\\'
+    assert _escape_like('Hall') == 'Hall'
+
+
+def test_similarity_matches_pg_trgm():
+    # pg_trgm's documented example: similarity('word', 'two words') = 0.363636
+    assert similarity('word', 'two words') == pytest.approx(4 / 11)
+    assert similarity('Hall', 'HALL') == 1.0
+    assert similarity('', 'Hall') == 0.0
+    assert similarity(None, 'Hall') == 0.0
+
+
+@pytest.fixture
+def venues(app):
+    rows = [
+        ('The Dueling Pianos Bar', 'New York', 'NY', ['Jazz']),
+        ('Park Square Live Music & Coffee', 'San Francisco', 'CA', ['Jazz', 'Folk']),
+        ('Piano', 'San Francisco', 'CA', ['Classical']),
+        ('100% Pianos', 'Oakland', 'CA', ['Jazz']),
+    ]
+    with app.app_context():
+        db.session.add_all(Venue(name=name, city=city, state=state, address='1 Main St',
+                                 phone='123-123-1234', genres=genres)
+                           for name, city, state, genres in rows)
+        db.session.commit()
+
+
+def names(venues):
+    return [venue.name for venue in venues]
+
+
+def test_sqlite_uses_python_search(app):
+    with app.app_context():
+        assert isinstance(search_engine(), PythonSearch)
+
+
+def test_python_search_ranks_by_similarity(app, venues):
+    with app.app_context():
+        assert names(PythonSearch().search(Venue, 'piano')) == [
+            'Piano', '100% Pianos', 'The Dueling Pianos Bar'
+        ]
+        assert names(PythonSearch().search(Venue, 'piano', limit=1)) == ['Piano']
+
+
+def test_python_search_by_location_and_genre(app, venues):
+    with app.app_context():
+        assert names(PythonSearch().search(Venue, 'san francisco, ca')) == [
+            'Park Square Live Music & Coffee', 'Piano'
+        ]
+        assert names(PythonSearch().search(Venue, 'san francisco, ca', genres=['Folk'])) == [
+            'Park Square Live Music & Coffee'
+        ]
+
+
+def test_python_search_matches_like_wildcards_literally(app, venues):
+    with app.app_context():
+        assert names(PythonSearch().search(Venue, '100%')) == ['100% Pianos']
+        assert names(PythonSearch().search(Venue, '%')) == ['100% Pianos']
+        assert names(PythonSearch().search(Venue, '_')) == []
+
+
+def test_search_results_payload(app, venues):
+    with app.app_context():
+        results = search_results(Venue, 'piano', 2)
+    assert results['count'] == 2
+    assert results['has_more'] is True
+    assert [result['name'] for result in results['data']] == ['Piano', '100% Pianos']
+    assert results['data'][0]['num_upcoming_shows'] == 0
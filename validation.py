@@ -0,0 +1,205 @@
+import ipaddress
+import re
+from datetime import datetime
+from functools import lru_cache
+
+from availability import parse_availability
+
+#----------------------------------------------------------------------------#
+# Validation.
+#----------------------------------------------------------------------------#
+# The choice tables and field rules of venues, artists and shows, shared by the
+# web forms (forms.py) and the bulk paths (importer.py, synthetic.py). The
+# rules are plain functions over plain values: choices are checked against
+# frozensets, phone numbers and URLs against regexes compiled once, and URL
+# hostnames are cached. A Schema runs them over a dict row directly, so bulk
+# loads validate each row in microseconds without building WTForms objects.
+# Messages and accepted values match the WTForms validators the forms used
+# before.
+
+STATES = (
+    'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'DC', 'FL', 'GA', 'HI', 'ID',
+    'IL', 'IN', 'IA', 'KS', 'KY', 'LA', 'ME', 'MT', 'NE', 'NV', 'NH', 'NJ', 'NM',
+    'NY', 'NC', 'ND', 'OH', 'OK', 'OR', 'MD', 'MA', 'MI', 'MN', 'MS', 'MO', 'PA',
+    'RI', 'SC', 'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV', 'WI', 'WY',
+)
+GENRES = (
+    'Alternative', 'Blues', 'Classical', 'Country', 'Electronic', 'Folk', 'Funk',
+    'Hip-Hop', 'Heavy Metal', 'Instrumental', 'Jazz', 'Musical Theatre', 'Pop',
+    'Punk', 'R&B', 'Reggae', 'Rock n Roll', 'Soul', 'Other',
+)
+STATE_CHOICES = tuple((state, state) for state in STATES)
+GENRE_CHOICES = tuple((genre, genre) for genre in GENRES)
+
+_STATES = frozenset(STATES)
+_GENRES = frozenset(GENRES)
+_PHONE = re.compile(r'^\d{3}-\d{3}-\d{4}$')
+# As wtforms.validators.URL(), which also checks the host (below)
+_URL = re.compile(r'^[a-z]+://(?P<host>[^\/\?:]+)(?P<port>:[0-9]+)?(?P<path>\/.*?)?(?P<query>\?.*)?$',
+                  re.IGNORECASE)
+_HOSTNAME_PART = re.compile(r'^(xn-|[a-z0-9_]+)(-[a-z0-9_-]+)*$', re.IGNORECASE)
+_TLD = re.compile(r'^([a-z]{2,20}|xn--([a-z0-9]+-)*[a-z0-9]+)$', re.IGNORECASE)
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class Invalid(ValueError):
+    """A value breaking a rule; the message is shown to the user."""
+
+#  Rules
+#  ----------------------------------------------------------------
+# Each takes a converted, non-empty value and returns it, possibly converted
+# further, or raises Invalid.
+
+def state(value):
+    if value not in _STATES:
+        raise Invalid('Not a valid choice.')
+    return value
+
+
+def genres(values):
+    if not _GENRES.issuperset(values):
+        raise Invalid('Not a valid choice.')
+    return values
+
+
+def phone(value):
+    if not _PHONE.match(value):
+        raise Invalid('Invalid phone number format')
+    return value
+
+
+@lru_cache(maxsize=1024)
+def valid_hostname(hostname):
+    try:
+        ipaddress.ip_address(hostname)
+        return True
+    except ValueError:
+        pass
+    try:
+        hostname = hostname.encode('idna').decode('ascii')
+    except UnicodeError:
+        pass
+    if len(hostname) > 253:
+        return False
+    parts = hostname.split('.')
+    if not all(part and len(part) <= 63 and _HOSTNAME_PART.match(part) for part in parts):
+        return False
+    return len(parts) >= 2 and bool(_TLD.match(parts[-1]))
+
+
+def url(value):
+    match = _URL.match(value)
+    if not match or not valid_hostname(match.group('host')):
+        raise Invalid('Invalid URL')
+    return value
+
+
+def available_times(value):
+    """The availability slots listed in ``value`` (see availability.py)."""
+    try:
+        return parse_availability(value)
+    except ValueError:
+        raise Invalid('Invalid time format. Please use YYYY-MM-DD HH:MM:SS '
+                      'or YYYY-MM-DD HH:MM:SS/YYYY-MM-DD HH:MM:SS')
+
+#  Conversion of raw values
+#  ----------------------------------------------------------------
+
+def text(raw):
+    if isinstance(raw, str):
+        raw = raw.strip()
+    return None if raw == '' else raw
+
+
+def flag(raw):
+    if isinstance(raw, str):
+        return raw.strip().lower() in ('1', 'true', 't', 'yes', 'y', 'on')
+    return bool(raw)
+
+
+def items(raw):
+    """A list from a list, or from a comma-separated string."""
+    if isinstance(raw, str):
+        return [item.strip() for item in raw.split(',') if item.strip()]
+    return list(raw or [])
+
+
+def timestamp(raw):
+    raw = text(raw)
+    if isinstance(raw, str):
+        try:
+            return datetime.strptime(raw, DATETIME_FORMAT)
+        except ValueError:
+            raise Invalid('Not a valid datetime value.')
+    return raw
+
+#  Schemas
+#  ----------------------------------------------------------------
+
+class Field:
+    """How to convert one raw value, and the rules it must pass unless empty."""
+
+    __slots__ = ('convert', 'rules', 'required')
+
+    def __init__(self, convert=text, *rules, required=False):
+        self.convert = convert
+        self.rules = rules
+        self.required = required
+
+
+class Schema:
+    """The fields of one kind of row."""
+
+    def __init__(self, **fields):
+        self.fields = tuple(fields.items())
+
+    def validate(self, record):
+        """Return (data, errors) for one dict row; ``errors`` maps field to message."""
+        data, errors = {}, {}
+        for name, field in self.fields:
+            try:
+                value = field.convert(record.get(name))
+                if value is None or value == []:
+                    if field.required:
+                        raise Invalid('This field is required.')
+                else:
+                    for rule in field.rules:
+                        value = rule(value)
+            except Invalid as e:
+                errors[name] = str(e)
+                continue
+            data[name] = value
+        return data, errors
+
+
+VENUE = Schema(
+    name=Field(required=True),
+    city=Field(required=True),
+    state=Field(text, state, required=True),
+    address=Field(required=True),
+    phone=Field(text, phone, required=True),
+    image_link=Field(text, url),
+    genres=Field(items, genres, required=True),
+    facebook_link=Field(text, url),
+    website=Field(text, url),
+    seeking_talent=Field(flag),
+    seeking_description=Field(),
+)
+ARTIST = Schema(
+    name=Field(required=True),
+    city=Field(required=True),
+    state=Field(text, state, required=True),
+    phone=Field(text, phone, required=True),
+    image_link=Field(text, url),
+    genres=Field(items, genres, required=True),
+    facebook_link=Field(text, url),
+    website=Field(text, url),
+    seeking_venue=Field(flag),
+    seeking_description=Field(),
+    available_times=Field(text, available_times, required=True),  # as slots
+)
+SHOW = Schema(
+    artist_id=Field(required=True),
+    venue_id=Field(required=True),
+    start_time=Field(timestamp, required=True),
+)
@@ -0,0 +1,10 @@
+from app import create_app
+from startup import warm_up
+
+#----------------------------------------------------------------------------#
+# WSGI entry point.
+#----------------------------------------------------------------------------#
+# For preforking servers: `gunicorn --preload wsgi:app` builds and warms up the
+# app once in the master (startup.py), and the forked workers share it.
+
+app = warm_up(create_app())